@@ -8,7 +8,7 @@
 # UI_LANGUAGE: English. All user-facing strings should be in English.
 # If a marker was being dragged, it will be handled by the marker's own bindings. # type: ignore
 # version number should be increased with each generated iteration by 0.01.
-# version 1.40
+# version 2.08
 
 import tkinter as tk
 from tkinter import filedialog, messagebox, font as tkFont, simpledialog, ttk
@@ -16,9 +16,19 @@ import customtkinter # Added for CustomTkinter
 import pandas as pd
 import fitz  # PyMuPDF
 import os
+import sys
+import json
+import struct
+import hashlib
+import numpy as np
+import queue
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 # import arabic_reshaper # Not directly used in the provided snippet, but kept if used by get_display
 from bidi.algorithm import get_display
-import matplotlib.font_manager as fm # Added for finding font file paths
 from PIL import Image, ImageTk # For signature image handling
 
 # Define marker colors for dynamic text fields
@@ -34,8 +44,388 @@ RESIZE_HANDLE_TAG = "resize_handle"
 RESIZE_HANDLE_COLOR = "gray" # Color for handles
 RESIZE_HANDLE_ACTIVE_COLOR = "blue" # Color when mouse is over a handle
 TEXT_ALIGNMENTS = ["left", "center", "right"] # For text alignment
+TEXT_ALIGNMENT_FACTORS = {"left": 0.0, "center": 0.5, "right": 1.0} # Fraction of text width shifted left of the anchor
 DEFAULT_PDF_TEXT_COLOR = (0, 0, 0) # Black
 OPERATION_MODES = ["Text Injection", "Signature Mode"]
+MARKER_DRAG_FRAME_MS = 16 # Marker drag moves are applied at most once per ~60 Hz frame
+MARKER_DRAG_SYNC_MS = 33 # At most ~30 PDF-coordinate syncs per second while dragging a marker
+ZOOM_SETTLE_RENDER_MS = 200 # Wheel idle time before the rescaled page preview is re-rendered by MuPDF
+BATCH_PROGRESS_POLL_MS = 100 # How often the UI collects finished rows from the worker processes
+BATCH_ROWS_IN_FLIGHT_PER_WORKER = 64 # Rows submitted ahead per worker: enough work to outlast a poll interval at fast-save speeds
+# Rendered (page, zoom) images kept for instant page/zoom switches, bounded by their total pixel count
+# (Tk holds 4 bytes per pixel, so ~100 MB). A Letter page is ~12M pixels at zoom 5 but ~1M at zoom 1.5.
+PAGE_IMAGE_CACHE_MAX_PIXELS = 25_000_000
+TK_FONT_CACHE_SIZE = 32 # Preview fonts kept per (family, pixel size)
+# doc.save() options. Each output only adds a few text objects to the template, so by default skip
+# MuPDF's object garbage collection and stream recompression. The embedded font file is then stored
+# uncompressed too: with a typical TTF (e.g. DejaVu Sans, ~750 KB) outputs come out about twice the size
+# of compact ones, and more with large CJK fonts. Compressing only the font (deflate_fonts) costs as much
+# time as a compact save, since the font is most of the work; "Compact output" trades speed for size.
+FAST_SAVE_OPTIONS = {"garbage": 0, "deflate": False, "clean": False}
+COMPACT_SAVE_OPTIONS = {"garbage": 4, "deflate": True}
+
+FONT_FILE_EXTENSIONS = (".ttf", ".otf", ".ttc")
+OPENPYXL_EXCEL_EXTENSIONS = (".xlsx", ".xlsm") # Read with openpyxl directly; other spreadsheets via pd.read_excel
+REGULAR_FONT_SUBFAMILIES = {"regular", "normal", "book", "roman"}
+FONT_INDEX_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".pdf_data_injector_fonts.json")
+OUTPUT_CACHE_FILENAME = ".pdf_data_injector_cache.json" # In the output folder: {output file name: content hash}
+_font_family_index = None # Lazily loaded {casefolded family name: font file path}
+_font_family_index_lock = threading.Lock() # The index may be preloaded on a background thread
+
+def _system_font_dirs():
+    """Returns the existing system/user font directories for the current platform."""
+    home = os.path.expanduser("~")
+    if sys.platform.startswith("win"):
+        font_dirs = [os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts"),
+                     os.path.join(os.environ.get("LOCALAPPDATA", ""), "Microsoft", "Windows", "Fonts")]
+    elif sys.platform == "darwin":
+        font_dirs = ["/System/Library/Fonts", "/Library/Fonts", os.path.join(home, "Library", "Fonts")]
+    else:
+        font_dirs = ["/usr/share/fonts", "/usr/local/share/fonts",
+                     os.path.join(home, ".fonts"), os.path.join(home, ".local", "share", "fonts")]
+    return [d for d in font_dirs if os.path.isdir(d)]
+
+def _read_font_names(font_path):
+    """
+    Reads the English family names (name IDs 1 and 16) and subfamily (name ID 2) from the
+    sfnt 'name' table of a TTF/OTF file (first face of a TTC). Returns (set_of_families, subfamily).
+    """
+    families, subfamily = set(), ""
+    try:
+        with open(font_path, "rb") as f:
+            font_offset = 0
+            if f.read(4) == b"ttcf": # Collection: use the first font
+                f.seek(12)
+                font_offset = struct.unpack(">I", f.read(4))[0]
+            f.seek(font_offset + 4)
+            num_tables = struct.unpack(">H", f.read(2))[0]
+            f.seek(font_offset + 12)
+            name_table_offset = None
+            for _ in range(num_tables):
+                tag, _checksum, offset, _length = struct.unpack(">4sIII", f.read(16))
+                if tag == b"name":
+                    name_table_offset = offset
+                    break
+            if name_table_offset is None:
+                return families, subfamily
+            f.seek(name_table_offset)
+            _format, count, string_offset = struct.unpack(">HHH", f.read(6))
+            records = [struct.unpack(">HHHHHH", f.read(12)) for _ in range(count)]
+            for platform_id, _encoding_id, language_id, name_id, length, offset in records:
+                if name_id not in (1, 2, 16):
+                    continue
+                if platform_id == 3 and language_id == 0x409:
+                    encoding = "utf-16-be"
+                elif platform_id == 1 and language_id == 0:
+                    encoding = "mac_roman"
+                else:
+                    continue # Non-English or unsupported platform record
+                f.seek(name_table_offset + string_offset + offset)
+                value = f.read(length).decode(encoding, errors="ignore").strip()
+                if not value:
+                    continue
+                if name_id == 2:
+                    subfamily = subfamily or value
+                else:
+                    families.add(value)
+    except (OSError, struct.error):
+        pass # Unreadable or malformed font file, skip it
+    return families, subfamily
+
+def _build_font_family_index():
+    """Scans the system font directories once and maps each family name to a font file (regular face preferred)."""
+    index = {}
+    regular_families = set()
+    for font_dir in _system_font_dirs():
+        for root, _dirs, files in os.walk(font_dir):
+            for file_name in files:
+                if not file_name.lower().endswith(FONT_FILE_EXTENSIONS):
+                    continue
+                font_path = os.path.join(root, file_name)
+                families, subfamily = _read_font_names(font_path)
+                is_regular = subfamily.lower() in REGULAR_FONT_SUBFAMILIES
+                for family in families:
+                    key = family.casefold()
+                    if key not in index or (is_regular and key not in regular_families):
+                        index[key] = font_path
+                        if is_regular:
+                            regular_families.add(key)
+    return index
+
+def _load_font_family_index():
+    """Loads the family -> file index from the JSON cache, rebuilding it when the font directories changed."""
+    font_dirs_mtime = {d: os.path.getmtime(d) for d in _system_font_dirs()}
+    try:
+        with open(FONT_INDEX_CACHE_PATH, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("font_dirs_mtime") == font_dirs_mtime:
+            return cached["families"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass # Missing or stale cache, rebuild below
+    index = _build_font_family_index()
+    try:
+        with open(FONT_INDEX_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"font_dirs_mtime": font_dirs_mtime, "families": index}, f)
+    except OSError as e:
+        print(f"Warning: Could not write font index cache '{FONT_INDEX_CACHE_PATH}': {e}")
+    return index
+
+def _get_font_family_index():
+    """Returns the family -> file index, loading it on first use (once, even with a preload thread running)."""
+    global _font_family_index
+    with _font_family_index_lock:
+        if _font_family_index is None:
+            _font_family_index = _load_font_family_index()
+        return _font_family_index
+
+def _preload_font_family_index():
+    """Loads the font index on a daemon thread so the first Generate does not wait for a font directory scan."""
+    if _font_family_index is None:
+        threading.Thread(target=_get_font_family_index, daemon=True).start()
+
+@lru_cache(maxsize=64)
+def _find_font_file(font_family):
+    """Returns the font file path for a font family name, resolved once per family per session."""
+    font_path = _get_font_family_index().get(font_family.casefold())
+    if font_path and os.path.isfile(font_path):
+        return font_path
+    # Not in the index (e.g. unusual naming): fall back to matplotlib's fuzzy matcher, imported only when needed
+    import matplotlib.font_manager as fm
+    return fm.findfont(font_family)
+
+_FONT_FAMILIES = None # (sorted list, set) of Tk font families, queried once per process
+
+def _get_font_families(root):
+    """Returns (sorted_family_list, family_set) for the Tk fonts, querying the platform font manager only once."""
+    global _FONT_FAMILIES
+    if _FONT_FAMILIES is None:
+        families = sorted(tkFont.families(root))
+        _FONT_FAMILIES = (families, set(families))
+    return _FONT_FAMILIES
+
+class PlacedSignature:
+    """A signature image placed on the PDF (rect in PDF points, y from top)."""
+    __slots__ = ("pil_image_idx", "pdf_rect_pts", "aspect_ratio", "selected", "tk_photo", "canvas_item_id")
+
+    def __init__(self, pil_image_idx, pdf_rect_pts, aspect_ratio):
+        self.pil_image_idx = pil_image_idx # Index into loaded_signature_pil_images
+        self.pdf_rect_pts = pdf_rect_pts # fitz.Rect
+        self.aspect_ratio = aspect_ratio # width / height of the source image
+        self.selected = False
+        self.tk_photo = None # ImageTk.PhotoImage, kept referenced while drawn
+        self.canvas_item_id = None
+
+class _ResizeState:
+    """State of an in-progress signature resize drag (slot attributes, read on every motion event)."""
+    __slots__ = ("active", "sig_idx", "handle_type", "start_mouse_x_canvas", "start_mouse_y_canvas",
+                 "original_pdf_rect", "aspect_ratio")
+
+    def __init__(self):
+        self.active = False
+        self.sig_idx = -1
+        self.handle_type = None # e.g., "tl", "tr", "br", "bl"
+        self.start_mouse_x_canvas = 0 # Canvas coords
+        self.start_mouse_y_canvas = 0 # Canvas coords
+        self.original_pdf_rect = None # (x0, y0, x1, y1) tuple of the signature at drag start (PDF points, y from top)
+        self.aspect_ratio = 1.0
+
+def _compute_resized_rect(original_rect, mouse_x, mouse_y, aspect_ratio, handle_type, min_dim=10):
+    """
+    Returns the (x0, y0, x1, y1) rect after dragging a corner handle to (mouse_x, mouse_y), all in PDF points
+    (y from top). The opposite corner of original_rect stays fixed, the aspect ratio is kept and each side is at least min_dim.
+    """
+    x0, y0, x1, y1 = original_rect
+    # Fixed corner depends on the handle; width/height grow towards the mouse
+    w = mouse_x - x0 if handle_type in ("br", "tr") else x1 - mouse_x
+    h = mouse_y - y0 if handle_type in ("br", "bl") else y1 - mouse_y
+    if aspect_ratio > 0:
+        if w / aspect_ratio > h:
+            h = w / aspect_ratio # Adjust height based on width
+        else:
+            w = h * aspect_ratio # Adjust width based on height
+    w = max(w, min_dim)
+    h = max(h, min_dim)
+    if handle_type == "br": # Top-Left is fixed
+        return x0, y0, x0 + w, y0 + h
+    if handle_type == "tl": # Bottom-Right is fixed
+        return x1 - w, y1 - h, x1, y1
+    if handle_type == "tr": # Bottom-Left is fixed
+        return x0, y1 - h, x0 + w, y1
+    if handle_type == "bl": # Top-Right is fixed
+        return x1 - w, y0, x1, y0 + h
+    return original_rect
+
+@lru_cache(maxsize=4096)
+def _bidi_display(text, is_rtl):
+    """Visual-order text for PDF output. Cached: the same cell values repeat across rows and previews."""
+    return get_display(text, base_dir='R' if is_rtl else 'L')
+
+@lru_cache(maxsize=8192)
+def _text_width_pt(fitz_font, text, font_size):
+    """Width of already-reordered text in points. Cached per (font, text, size); a new font object starts fresh entries."""
+    return fitz_font.text_length(text, fontsize=font_size)
+
+def _iter_excel_rows(path):
+    """
+    Yields the first sheet of a spreadsheet as lists of raw cell values (None for empty cells).
+    .xlsx/.xlsm files are read with openpyxl in read-only mode, one row at a time; trailing empty rows
+    are dropped like pandas does. Every other format (.xls, .xlsb, .ods, ...) goes through pd.read_excel.
+    """
+    if os.path.splitext(path)[1].lower() not in OPENPYXL_EXCEL_EXTENSIONS: # openpyxl only reads OOXML workbooks
+        df = pd.read_excel(path, header=None, dtype=object)
+        for row in df.itertuples(index=False, name=None):
+            yield [None if pd.isna(v) else int(v) if isinstance(v, float) and v.is_integer() else v for v in row]
+        return
+    import openpyxl # pandas' .xlsx engine, only needed once a file is loaded
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        pending_empty_rows = 0 # Empty rows are only emitted once a later row has data
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            values = [None if v == "" else int(v) if isinstance(v, float) and v.is_integer() else v for v in row]
+            if all(v is None for v in values):
+                pending_empty_rows += 1
+                continue
+            for _ in range(pending_empty_rows):
+                yield []
+            pending_empty_rows = 0
+            yield values
+    finally:
+        workbook.close()
+
+def _read_excel_table(path):
+    """Reads the first sheet into an object-dtype DataFrame (values as stored, no type inference), trailing empty columns dropped."""
+    # The rows are still collected into a list of lists first; ragged rows are padded with None
+    df = pd.DataFrame(list(_iter_excel_rows(path)), dtype=object)
+    if df.empty:
+        return df
+    nonempty_cols = np.flatnonzero(df.notna().any(axis=0).to_numpy())
+    return df.iloc[:, :nonempty_cols[-1] + 1] if len(nonempty_cols) else df.iloc[:, :0]
+
+def _cell_string_table(df):
+    """Converts the whole table to a 2-D object array of cell strings ("" for empty cells) in vectorized passes."""
+    str_table = df.astype(str)
+    nonempty = df.notna() & (str_table != "")
+    return str_table.where(nonempty, "").to_numpy(dtype=object)
+
+def _get_page_text_writer(doc, text_writers, page_num):
+    """
+    Returns the TextWriter collecting text for page_num of doc, creating it on first use.
+    Returns None for rotated pages, whose fields are written one by one with _write_rotated_page_text.
+    """
+    if page_num not in text_writers:
+        page = doc.load_page(page_num)
+        text_writers[page_num] = None if page.rotation else fitz.TextWriter(page.rect, color=DEFAULT_PDF_TEXT_COLOR)
+    return text_writers[page_num]
+
+def _write_page_text_writers(doc, text_writers):
+    """Writes every collected TextWriter to its page (one content-stream write per page)."""
+    for page_num, text_writer in text_writers.items():
+        if text_writer is not None:
+            text_writer.write_text(doc.load_page(page_num)) # Color was fixed when the writer was created
+
+def _write_rotated_page_text(page, point, text, fitz_font, font_size):
+    """
+    Writes one field on a page with /Rotate set. TextWriter ignores the rotation, so the text is appended at
+    the unrotated position of the visible point and turned by the page rotation around that same point.
+    """
+    unrotated_point = fitz.Point(point) * page.derotation_matrix
+    text_writer = fitz.TextWriter(page.rect, color=DEFAULT_PDF_TEXT_COLOR)
+    text_writer.append(unrotated_point, text, font=fitz_font, fontsize=font_size)
+    text_writer.write_text(page, morph=(unrotated_point, fitz.Matrix(page.rotation)))
+
+def _render_row_text(doc, row_values, field_specs, fitz_font):
+    """
+    Writes one row onto doc. row_values holds the cell strings indexed by original Excel
+    column ("" for empty cells, which are skipped).
+    """
+    excel_cols = field_specs["excel_col"]
+    field_indices = [i for i, col in enumerate(excel_cols.tolist()) if col < len(row_values) and row_values[col]]
+    if not field_indices:
+        return
+    is_rtl = field_specs["is_rtl"]
+    font_sizes = field_specs["font_size"]
+    align_factors = field_specs["align_factor"]
+
+    texts_to_render = []
+    text_widths_pt = np.zeros(len(field_indices))
+    for n, i in enumerate(field_indices):
+        text_to_render = _bidi_display(row_values[excel_cols[i]], bool(is_rtl[i]))
+        texts_to_render.append(text_to_render)
+        if align_factors[i]: # Width only matters for center/right alignment
+            text_widths_pt[n] = _text_width_pt(fitz_font, text_to_render, float(font_sizes[i]))
+
+    # Alignment offset for all fields of the row in one vectorized pass
+    selected = np.array(field_indices)
+    final_x_pt = field_specs["x"][selected] - text_widths_pt * align_factors[selected]
+    insertion_y_pt = field_specs["insertion_y"][selected]
+
+    text_writers = {} # page_num -> fitz.TextWriter, batches all fields of a page (None for rotated pages)
+    for n, i in enumerate(field_indices):
+        page_num = int(field_specs["page_num"][i])
+        insertion_point = (float(final_x_pt[n]), float(insertion_y_pt[n])) # Visible page coordinates
+        text_writer = _get_page_text_writer(doc, text_writers, page_num)
+        if text_writer is None:
+            _write_rotated_page_text(doc.load_page(page_num), insertion_point, texts_to_render[n],
+                                     fitz_font, float(font_sizes[i]))
+        else:
+            text_writer.append(insertion_point, texts_to_render[n], font=fitz_font, fontsize=float(font_sizes[i]))
+    _write_page_text_writers(doc, text_writers)
+
+def _batch_input_hasher(template_bytes, font_family, font_bytes, field_specs, save_options):
+    """Returns a blake2b hasher over every row-independent input of a batch; copy it and add a row to key that row's output."""
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(template_bytes)
+    hasher.update(font_bytes)
+    hasher.update(font_family.encode())
+    for name in sorted(field_specs):
+        hasher.update(name.encode())
+        hasher.update(np.ascontiguousarray(field_specs[name]).tobytes())
+    hasher.update(repr(sorted(save_options.items())).encode())
+    return hasher
+
+def _load_output_cache(output_dir):
+    """Reads the {output file name: content hash} map of earlier batches in output_dir ({} if missing or unreadable)."""
+    try:
+        with open(os.path.join(output_dir, OUTPUT_CACHE_FILENAME), "r", encoding="utf-8") as cache_file:
+            output_cache = json.load(cache_file)
+        return output_cache if isinstance(output_cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def _save_output_cache(output_dir, output_cache):
+    """Writes the {output file name: content hash} map next to the generated files."""
+    try:
+        with open(os.path.join(output_dir, OUTPUT_CACHE_FILENAME), "w", encoding="utf-8") as cache_file:
+            json.dump(output_cache, cache_file)
+    except OSError:
+        pass # Only costs a full regeneration next time
+
+def _write_bytes_to_file(path, data):
+    """Writes a serialized PDF to disk (runs on the output writer thread; file I/O releases the GIL)."""
+    with open(path, "wb") as output_file:
+        output_file.write(data)
+
+_render_worker_state = {} # Row-independent inputs of a batch, set once per worker process by _init_render_worker
+
+def _init_render_worker(template_bytes, font_family, font_bytes, field_specs, save_options):
+    """ProcessPoolExecutor initializer: keeps the template bytes, parsed font, field geometry and save options once per worker process."""
+    _render_worker_state["template_bytes"] = template_bytes
+    _render_worker_state["font"] = fitz.Font(fontname=font_family, fontbuffer=font_bytes) # Parsed from memory, no per-worker file read
+    _render_worker_state["field_specs"] = field_specs
+    _render_worker_state["save_options"] = save_options
+
+def _render_one_pdf(row_values, output_path):
+    """Renders one output PDF from the template in a worker process and saves it to output_path."""
+    doc = fitz.open(stream=_render_worker_state["template_bytes"], filetype="pdf") # In-memory copy, no disk read per row
+    try:
+        _render_row_text(doc, row_values, _render_worker_state["field_specs"], _render_worker_state["font"])
+        doc.save(output_path, **_render_worker_state["save_options"])
+    except Exception as e:
+        # PyMuPDF exceptions cannot be pickled back to the UI process; send the message instead
+        raise RuntimeError(f"{os.path.basename(output_path)}: {e}") from None
+    finally:
+        doc.close()
+    return output_path
 
 class PDFBatchApp:
     def __init__(self, master):
@@ -56,6 +446,7 @@ class PDFBatchApp:
         self.excel_display_var = tk.StringVar(value="(No file selected)")
         self.output_dir_display_var = tk.StringVar(value="(No folder selected)")
         self.include_header_row = tk.BooleanVar(value=False) # Default: Exclude header row
+        self.compact_output = tk.BooleanVar(value=False) # Default: fast saves (see FAST_SAVE_OPTIONS)
         self.font_family_var = tk.StringVar() 
         # self.font_size_var = tk.IntVar(value=12) # Default font size - Will be per-column now
         self.excel_preview_text = tk.StringVar(value="Excel Preview: (Load Excel file)") # For internal data, not displayed directly
@@ -79,9 +470,7 @@ class PDFBatchApp:
         # --- Signature Mode Variables ---
         self.signature_mode_active = tk.BooleanVar(value=False)
         self.loaded_signature_pil_images = [] # List of (PIL.Image, image_path, display_name)
-        self.placed_signatures_data = [] # List of dicts for each placed signature instance
-        # Each dict: {'pil_image_idx': int, 'pdf_rect_pts': fitz.Rect, 'tk_photo': ImageTk.PhotoImage, 
-        #             'canvas_item_id': int, 'selected': False, 'aspect_ratio': float}
+        self.placed_signatures_data = [] # List of PlacedSignature objects, one per placed signature instance
         self.active_signature_pil_idx_to_place = tk.IntVar(value=-1) # Index in self.loaded_signature_pil_images
         self.selected_placed_signature_idx = tk.IntVar(value=-1) # Index in self.placed_signatures_data
         # self.signature_width_var = tk.DoubleVar(value=DEFAULT_SIGNATURE_WIDTH_PT) # Removed for drag-resize
@@ -90,6 +479,7 @@ class PDFBatchApp:
         self._bind_variables() # Renamed from _bind_font_variables
 
         self.pdf_doc = None
+        self._template_pdf_bytes = None # Raw template file, read once at load; every output copy is opened from it
         self.pdf_page_width_pt = 0
         self.pdf_page_height_pt = 0
         self.image_on_canvas_width_px = 0
@@ -97,10 +487,14 @@ class PDFBatchApp:
 
         self.photo_image = None # To prevent garbage collection
         self.coords_pdf = [] # List to store PDF coordinates for each text field
+        self._next_unassigned_idx = 0 # Every coords_pdf entry before this index is placed (placements are never cleared)
         self.active_coord_to_set_idx = None # Index of the coordinate currently being set by click
         self.excel_data_preview = None
+        self._excel_cell_strings = None # 2-D object array of the sheet's cell strings ("" for empty), built once per load
         self.num_excel_cols = 0 # Number of columns detected in Excel, determines number of text fields
-        self.preview_text_items = [] # Store IDs of preview text items on canvas
+        self.preview_text_items = {} # managed_idx -> [canvas item id, visible, (x, y), (text, font, anchor)] of the persistent preview text items
+        self._fitz_font_cache = None # (family, font file bytes, fitz.Font) of the last output font, see _get_fitz_font
+        self._tk_font_cache = OrderedDict() # (family, size) -> tkFont.Font, LRU-bounded by TK_FONT_CACHE_SIZE
         self.is_text_preview_active = True # Default to text preview being active
         self._drag_data = {"x": 0, "y": 0, "item": None, "col_idx": None} # For dragging markers
         self._item_drag_active = False # New flag: True if a marker or signature is being dragged
@@ -111,18 +505,26 @@ class PDFBatchApp:
             "has_dragged_for_pan": False,  # True if mouse moved enough during B1 hold
             "pan_threshold": 5  # pixels, adjust as needed
         }
-        self._resize_data = {
-            "active": False,
-            "sig_idx": -1,
-            "handle_type": None, # e.g., "tl", "tr", "br", "bl"משה
-            "start_mouse_x_canvas": 0, # Canvas coords
-            "start_mouse_y_canvas": 0, # Canvas coords
-            "original_pdf_rect": None, # fitz.Rect of the signature at drag start (PDF points, y from top)
-            "canvas_item_id_sig": None, 
-            "aspect_ratio": 1.0
-        }
+        self._resize_data = _ResizeState()
+        self._handle_meta = {} # Resize handle canvas item_id -> (sig_idx, handle_type)
+        self._output_writer = ThreadPoolExecutor(max_workers=1) # Writes single/signed output PDFs off the Tk thread, in order
+        self._batch_job = None # State of the running batch generation (futures, progress queue, counters)
+        self._marker_item_meta = {} # Marker rectangle / preview text item_id -> managed_idx (replaces tag parsing on press)
+        self._sig_item_meta = {} # Signature image canvas item_id -> sig_idx
+        self._marker_items = {} # managed_idx -> [canvas item_id, color, visible, (x, y) last set]; markers are reused across redraws
         self._zoom_debounce_timer = None
+        self._zoom_settle_timer = None # Pending real render after a wheel-zoom burst
+        self._last_page_pixmap = None # (page_number, pixmap, width_pt, height_pt) of the most recent MuPDF render
+        self._page_image_cache = OrderedDict() # (page_number, zoom) -> (ImageTk.PhotoImage, page_width_pt, page_height_pt), LRU order
+        self._page_image_cache_pixels = 0 # Sum of width * height over _page_image_cache
         self._DEBOUNCE_TIME_MS = 10 # Milliseconds to wait before applying zoom (reduced from 75 for responsiveness)
+        self._preview_update_timer = None
+        self._marker_drag_move_timer = None # Pending coalesced canvas move while dragging a marker
+        self._marker_drag_sync_timer = None # Pending throttled coords_pdf sync while dragging a marker
+        # Set by item press handlers, which Tk runs before _on_canvas_b1_press. Every item/tag binding that can
+        # receive a B1 press must set it, including <Double-Button-1> (it replaces <ButtonPress-1> on the second press).
+        self._item_press_active = False
+        self._PREVIEW_DEBOUNCE_TIME_MS = 40 # Coalesces bursts of font/RTL/alignment/row changes into one preview redraw
 
         # --- GUI Layout ---
         # Main application frame
@@ -209,13 +611,16 @@ class PDFBatchApp:
         font_details_subframe.pack(fill=tk.X, padx=0, pady=0)
         
         # Populate font families
-        font_families = sorted(list(tkFont.families()))
-        self.font_combo = customtkinter.CTkComboBox(font_details_subframe, variable=self.font_family_var, values=font_families, width=180, state="readonly")
-        if "Arial" in font_families:
+        font_families, self._valid_tk_font_families = _get_font_families(self.master) # Set is the whitelist for preview font validation
+        if "Arial" in self._valid_tk_font_families:
             self.font_family_var.set("Arial") # Default font
         elif font_families:
             self.font_family_var.set(font_families[0]) # Fallback to first available font
+        # Start with just the default entry: the dropdown builds one menu entry per family, so the
+        # full list is filled in after the window is up instead of on the startup path.
+        self.font_combo = customtkinter.CTkComboBox(font_details_subframe, variable=self.font_family_var, values=[self.font_family_var.get()], width=180, state="readonly")
         self.font_combo.pack(side=tk.LEFT, padx=(5,2), pady=2)
+        self.master.after_idle(lambda: self.font_combo.configure(values=font_families))
 
         customtkinter.CTkLabel(font_details_subframe, text="Size:").pack(side=tk.LEFT, padx=(10, 2), pady=2)
         # Global font size entry and buttons are removed. Will be per-column.
@@ -255,6 +660,7 @@ class PDFBatchApp:
 
         self.generate_all_pdfs_button = customtkinter.CTkButton(self.generate_buttons_frame, text="Generate PDF Files", command=self.generate_output_pdfs, font=("Arial", 12, "bold"), fg_color="#A6D8F0", text_color="black", hover_color="#8AC7E6")
         self.generate_current_pdf_button = customtkinter.CTkButton(self.generate_buttons_frame, text="Generate Current PDF", command=self.generate_single_preview_pdf)
+        customtkinter.CTkCheckBox(self.generate_buttons_frame, text="Compact output", variable=self.compact_output, width=30).pack(side=tk.LEFT, padx=(5,0))
 
 
 
@@ -292,10 +698,12 @@ class PDFBatchApp:
         # with the same rich drawing and event binding capabilities.
         # tk.Scrollbar is also used for compatibility with tk.Canvas.
         self.canvas = tk.Canvas(self.canvas_container, bg="lightgrey") # Changed bg for better visibility
+        self._canvas_xoff = 0.0 # Cached canvasx(0)/canvasy(0), refreshed whenever the view scrolls
+        self._canvas_yoff = 0.0
 
         self.h_scrollbar = tk.Scrollbar(self.canvas_container, orient=tk.HORIZONTAL, command=self.canvas.xview)
         self.v_scrollbar = tk.Scrollbar(self.canvas_container, orient=tk.VERTICAL, command=self.canvas.yview)
-        self.canvas.configure(xscrollcommand=self.h_scrollbar.set, yscrollcommand=self.v_scrollbar.set)
+        self.canvas.configure(xscrollcommand=self._on_canvas_xscroll, yscrollcommand=self._on_canvas_yscroll)
 
         self.h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
         self.v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -320,7 +728,7 @@ class PDFBatchApp:
         self.canvas.tag_bind(RESIZE_HANDLE_TAG, "<Enter>", self._on_resize_handle_enter)
         self.canvas.tag_bind(RESIZE_HANDLE_TAG, "<Leave>", self._on_resize_handle_leave)
         self.canvas.tag_bind(RESIZE_HANDLE_TAG, "<ButtonPress-1>", self._on_resize_handle_press)
-        # Motion and Release for resize handles will be managed by the global canvas bindings when _resize_data["active"] is true
+        # Motion and Release for resize handles will be managed by the global canvas bindings when _resize_data.active is true
 
         # Bindings for mouse wheel zoom
         self.canvas.bind("<MouseWheel>", self._handle_mouse_wheel_zoom)  # Windows & MacOS
@@ -529,7 +937,9 @@ class PDFBatchApp:
             
             # Clear text-related previews and data
             self.excel_data_preview = None
+            self._excel_cell_strings = None
             self.coords_pdf = []
+            self._next_unassigned_idx = 0
             self.num_excel_cols = 0
             self.managed_columns.clear()
             self._update_text_preview() # Clears text preview
@@ -628,7 +1038,7 @@ class PDFBatchApp:
             customtkinter.CTkLabel(self.column_controls_sidebar, text="Placed on Document:", anchor="w").pack(fill=tk.X, pady=(10,2), padx=5)
             selected_placed_idx = self.selected_placed_signature_idx.get()
             for idx, sig_data_item in enumerate(self.placed_signatures_data):
-                pil_image_idx = sig_data_item['pil_image_idx']
+                pil_image_idx = sig_data_item.pil_image_idx
                 _, _, display_name = self.loaded_signature_pil_images[pil_image_idx]
                 
                 item_frame = customtkinter.CTkFrame(self.column_controls_sidebar, border_width=1) # Replaces bd/relief
@@ -724,6 +1134,23 @@ class PDFBatchApp:
             self._build_dynamic_coord_controls() # Refresh sidebar to show selection
 
     def _on_font_change(self, *args):
+        if self.is_text_preview_active and not self.signature_mode_active.get():
+            self._schedule_preview_update()
+
+    def _schedule_preview_update(self):
+        """Debounces _update_text_preview so a burst of variable traces triggers a single redraw."""
+        if self._preview_update_timer is not None:
+            self.master.after_cancel(self._preview_update_timer)
+        self._preview_update_timer = self.master.after(self._PREVIEW_DEBOUNCE_TIME_MS, self._do_preview_update)
+
+    def _schedule_viewport_preview_update(self):
+        """After a scroll, pan or canvas resize, redraws the preview (it only shows fields near the viewport)."""
+        # Throttled rather than debounced, so fields come into view while the pan is still going on
+        if self.is_text_preview_active and self._preview_update_timer is None:
+            self._preview_update_timer = self.master.after(self._PREVIEW_DEBOUNCE_TIME_MS, self._do_preview_update)
+
+    def _do_preview_update(self):
+        self._preview_update_timer = None # Reset timer ID
         if self.is_text_preview_active and not self.signature_mode_active.get():
             self._update_text_preview()
 
@@ -797,7 +1224,7 @@ class PDFBatchApp:
             self.preview_row_index.set(new_idx)
             self._update_preview_row_display_and_buttons()
             if self.is_text_preview_active:
-                self._update_text_preview()
+                self._schedule_preview_update()
 
     def _update_preview_row_display_and_buttons(self):
         if self.excel_data_preview is not None and not self.excel_data_preview.empty and hasattr(self, 'prev_row_button'): # Ensure buttons exist
@@ -845,14 +1272,24 @@ class PDFBatchApp:
             factor_change = -0.25
         
         if factor_change != 0:
-            # Pass mouse coordinates to the zoom function
-            self.zoom(factor_change, mouse_x_img_old, mouse_y_img_old, event.x, event.y)
-
-    def zoom(self, factor_change, mouse_x_img_old=None, mouse_y_img_old=None, mouse_widget_x=None, mouse_widget_y=None):
+            # Pass mouse coordinates to the zoom function. While the wheel is turning the page is only
+            # rescaled from the last render; MuPDF re-renders once the wheel has been still for a moment.
+            self.zoom(factor_change, mouse_x_img_old, mouse_y_img_old, event.x, event.y, quick=True)
+            if self._zoom_settle_timer is not None:
+                self.master.after_cancel(self._zoom_settle_timer)
+            self._zoom_settle_timer = self.master.after(ZOOM_SETTLE_RENDER_MS, self._render_settled_zoom)
+
+    def _render_settled_zoom(self):
+        """Replaces the rescaled wheel-zoom preview with a real render at the final zoom."""
+        self._zoom_settle_timer = None # Reset timer ID
+        self._redisplay_pdf_page()
+
+    def zoom(self, factor_change, mouse_x_img_old=None, mouse_y_img_old=None, mouse_widget_x=None, mouse_widget_y=None, quick=False):
         """
         Zooms the PDF preview.
         If mouse coordinates are provided, zooms towards the mouse cursor.
         Otherwise (e.g., for button clicks), attempts to maintain the current view.
+        With quick=True the page image may be a rescaled copy of the last render (see _redisplay_pdf_page).
         """
         if not self.pdf_doc:
             return
@@ -881,7 +1318,7 @@ class PDFBatchApp:
         self.current_zoom_factor.set(new_zoom)
         self.zoom_display_var.set(f"Zoom: {int(new_zoom * 100)}%")
         
-        self._redisplay_pdf_page() # This updates self.image_on_canvas_width_px etc. based on new_zoom
+        self._redisplay_pdf_page(quick=quick) # This updates self.image_on_canvas_width_px etc. based on new_zoom
 
         if mouse_x_img_old is not None and mouse_y_img_old is not None and \
            mouse_widget_x is not None and mouse_widget_y is not None and old_zoom > 0:
@@ -907,8 +1344,35 @@ class PDFBatchApp:
         elif mouse_x_img_old is None: # Fallback for button zoom: try to restore old view fraction
             self.canvas.xview_moveto(old_view_x_fraction)
             self.canvas.yview_moveto(old_view_y_fraction)
-
-    def _redisplay_pdf_page(self, page_number=None):
+        self._refresh_canvas_scroll_offsets()
+
+    def _on_canvas_xscroll(self, first, last):
+        """Canvas xscrollcommand: updates the scrollbar and the cached horizontal scroll offset."""
+        self.h_scrollbar.set(first, last)
+        self._canvas_xoff = self.canvas.canvasx(0)
+        self._schedule_viewport_preview_update()
+
+    def _on_canvas_yscroll(self, first, last):
+        """Canvas yscrollcommand: updates the scrollbar and the cached vertical scroll offset."""
+        self.v_scrollbar.set(first, last)
+        self._canvas_yoff = self.canvas.canvasy(0)
+        self._schedule_viewport_preview_update()
+
+    def _refresh_canvas_scroll_offsets(self):
+        # Scroll commands run at idle time; refresh right away after moving the view ourselves
+        self._canvas_xoff = self.canvas.canvasx(0)
+        self._canvas_yoff = self.canvas.canvasy(0)
+
+    def _event_canvas_xy(self, event):
+        """Converts event widget coordinates to canvas coordinates using the cached scroll offsets (no Tcl calls)."""
+        return event.x + self._canvas_xoff, event.y + self._canvas_yoff
+
+    def _redisplay_pdf_page(self, page_number=None, quick=False):
+        """
+        Draws the page at the current zoom. With quick=True (wheel zoom in progress) a cache miss is
+        served by a nearest-neighbour rescale of the last rendered pixmap of this page instead of a
+        MuPDF render; that image is not cached and is replaced once the zoom settles.
+        """
         if not self.pdf_doc:
             return
 
@@ -925,24 +1389,52 @@ class PDFBatchApp:
                 self.current_pdf_page_num.set(0)
             else: # No pages in PDF
                 self.canvas.delete("all")
+                self._marker_items.clear()
+                self.preview_text_items.clear()
+                self._marker_item_meta.clear()
                 self.photo_image = None
                 self.image_on_canvas_width_px = 0
                 self.image_on_canvas_height_px = 0
                 self.canvas.config(scrollregion=(0,0,0,0))
                 return
 
-        page = self.pdf_doc.load_page(page_number)
         zoom_val = self.current_zoom_factor.get()
-        mat = fitz.Matrix(zoom_val, zoom_val)
-        pix = page.get_pixmap(matrix=mat)
+        cache_key = (page_number, round(zoom_val, 2))
+        cached_page_image = self._page_image_cache.get(cache_key)
+        last_pixmap = self._last_page_pixmap
+        if cached_page_image is not None:
+            self._page_image_cache.move_to_end(cache_key) # Mark as most recently used
+            photo_image, page_width_pt, page_height_pt = cached_page_image
+        elif quick and last_pixmap is not None and last_pixmap[0] == page_number:
+            _, pix, page_width_pt, page_height_pt = last_pixmap
+            target_size = (max(1, round(page_width_pt * zoom_val)), max(1, round(page_height_pt * zoom_val)))
+            source_image = Image.frombuffer("RGB", (pix.width, pix.height), pix.samples_mv, "raw", "RGB", pix.stride, 1)
+            photo_image = ImageTk.PhotoImage(source_image.resize(target_size, Image.NEAREST))
+        else: # Rasterize and encode only on a cache miss
+            page = self.pdf_doc.load_page(page_number)
+            mat = fitz.Matrix(zoom_val, zoom_val)
+            # alpha=False pins the 3-byte RGB layout frombuffer expects. Annotations stay on, since form fields
+            # and stamps are part of what the user is positioning text against.
+            pix = page.get_pixmap(matrix=mat, alpha=False)
+            # Wrap the raw RGB samples in place (zero-copy memoryview); avoids encoding a PPM only for Tk to parse it again.
+            # PhotoImage copies the pixels into Tk; pix is kept as _last_page_pixmap for quick wheel-zoom rescales.
+            photo_image = ImageTk.PhotoImage(Image.frombuffer("RGB", (pix.width, pix.height), pix.samples_mv, "raw", "RGB", pix.stride, 1))
+            page_width_pt, page_height_pt = page.rect.width, page.rect.height
+            self._last_page_pixmap = (page_number, pix, page_width_pt, page_height_pt) # Source for quick wheel-zoom rescales
+            self._page_image_cache[cache_key] = (photo_image, page_width_pt, page_height_pt)
+            self._page_image_cache_pixels += photo_image.width() * photo_image.height()
+            # Evict least recently used images until under budget, always keeping the one just rendered
+            while self._page_image_cache_pixels > PAGE_IMAGE_CACHE_MAX_PIXELS and len(self._page_image_cache) > 1:
+                evicted_image = self._page_image_cache.popitem(last=False)[1][0]
+                self._page_image_cache_pixels -= evicted_image.width() * evicted_image.height()
 
         # Update page dimensions based on the *current* page being displayed (if they can vary)
-        self.image_on_canvas_width_px = pix.width
-        self.image_on_canvas_height_px = pix.height
+        self.image_on_canvas_width_px = photo_image.width()
+        self.image_on_canvas_height_px = photo_image.height()
         
         # CRITICAL: Update self.pdf_page_width_pt and self.pdf_page_height_pt to current page's dimensions
-        self.pdf_page_width_pt = page.rect.width
-        self.pdf_page_height_pt = page.rect.height
+        self.pdf_page_width_pt = page_width_pt
+        self.pdf_page_height_pt = page_height_pt
 
         # Get actual canvas dimensions
         canvas_actual_width = self.canvas.winfo_width()
@@ -964,11 +1456,13 @@ class PDFBatchApp:
             draw_y = (canvas_actual_height - self.image_on_canvas_height_px) // 2
             scroll_h = canvas_actual_height
 
-        self.photo_image = tk.PhotoImage(data=pix.tobytes("ppm"))
+        self.photo_image = photo_image
         self.canvas.delete("pdf_image") # Delete only the old PDF image
         self.canvas.create_image(draw_x, draw_y, anchor=tk.NW, image=self.photo_image, tags="pdf_image")
+        self.canvas.tag_lower("pdf_image") # Keep the page under the persistent markers and other items
         
         self.canvas.config(scrollregion=(0, 0, scroll_w, scroll_h))
+        self._refresh_canvas_scroll_offsets()
 
         self._update_page_nav_controls() # Update page display like "Page 1/X"
         self._draw_markers()
@@ -979,45 +1473,81 @@ class PDFBatchApp:
             self._draw_placed_signatures()
 
     def _draw_markers(self):
-        self.canvas.delete("marker") # Delete all items with the general "marker" tag
-        if self.signature_mode_active.get(): return # No text markers in signature mode
+        # Marker rectangles are created once per managed column and then only moved/shown/hidden
+        marker_items = self._marker_items
+        if self.signature_mode_active.get() or not self.pdf_doc or \
+           self.pdf_page_width_pt == 0 or self.pdf_page_height_pt == 0: # No text markers in signature mode
+            for item_id, _, _, _ in marker_items.values():
+                self.canvas.delete(item_id)
+                self._marker_item_meta.pop(item_id, None)
+            marker_items.clear()
+            return
+        for managed_idx in [idx for idx in marker_items if idx >= len(self.managed_columns)]: # Removed columns
+            item_id = marker_items.pop(managed_idx)[0]
+            self.canvas.delete(item_id)
+            self._marker_item_meta.pop(item_id, None)
         marker_radius = 5
         current_page_on_canvas = self.current_pdf_page_num.get()
 
-        # Iterate through managed_columns, as coords_pdf is indexed by managed_idx
-        for managed_idx in range(len(self.managed_columns)):
-            if managed_idx < len(self.coords_pdf): # Ensure coords_pdf has an entry for this managed_idx
-                coord_data = self.coords_pdf[managed_idx]
-                if coord_data and coord_data.get('coord') and coord_data.get('page_num') == current_page_on_canvas:
-                    pdf_coord_tuple = coord_data['coord']
-                    relative_canvas_coords = self._pdf_coords_to_relative_canvas_coords(pdf_coord_tuple)
-                    if relative_canvas_coords:
-                        pdf_image_x_offset, pdf_image_y_offset = self._get_pdf_image_offset_on_canvas()
-                        abs_canvas_x = relative_canvas_coords[0] + pdf_image_x_offset
-                        abs_canvas_y = relative_canvas_coords[1] + pdf_image_y_offset
-
-                        # Color based on original_excel_col_idx for consistency if columns are duplicated
-                        original_excel_idx = self.managed_columns[managed_idx]['original_excel_col_idx']
-                        color = MARKER_COLORS[original_excel_idx % len(MARKER_COLORS)]
-                        
-                        marker_tag = f"marker_{managed_idx}" # Tag uses managed_idx
-                        self.canvas.create_rectangle(
-                            abs_canvas_x - marker_radius, abs_canvas_y - marker_radius,
-                            abs_canvas_x + marker_radius, abs_canvas_y + marker_radius,
-                            fill=color, outline=color, tags=(marker_tag, "marker")
-                        )
+        # Collect the markers placed on this page (coords_pdf is indexed by managed_idx)
+        visible_markers = [(managed_idx, coord_data['coord'])
+                           for managed_idx, coord_data in enumerate(self.coords_pdf[:len(self.managed_columns)])
+                           if coord_data and coord_data.get('coord') and coord_data.get('page_num') == current_page_on_canvas]
+        visible_indices = {managed_idx for managed_idx, _ in visible_markers}
+        for managed_idx, marker_item in marker_items.items():
+            if marker_item[2] and managed_idx not in visible_indices: # Unplaced or on another page
+                self.canvas.itemconfigure(marker_item[0], state="hidden")
+                marker_item[2] = False
+        if not visible_markers:
+            return
+
+        # PDF (origin bottom-left) -> absolute canvas coordinates for all markers in one vectorized pass
+        coords_arr = np.array([coord for _, coord in visible_markers], dtype=float)
+        pdf_image_x_offset, pdf_image_y_offset = self._get_pdf_image_offset_on_canvas()
+        abs_canvas_xs = coords_arr[:, 0] * (self.image_on_canvas_width_px / self.pdf_page_width_pt) + pdf_image_x_offset
+        abs_canvas_ys = (1 - coords_arr[:, 1] / self.pdf_page_height_pt) * self.image_on_canvas_height_px + pdf_image_y_offset
+
+        for (managed_idx, _), abs_canvas_x, abs_canvas_y in zip(visible_markers, abs_canvas_xs.tolist(), abs_canvas_ys.tolist()):
+            # Color based on original_excel_col_idx for consistency if columns are duplicated
+            original_excel_idx = self.managed_columns[managed_idx]['original_excel_col_idx']
+            color = MARKER_COLORS[original_excel_idx % len(MARKER_COLORS)]
+            
+            marker_item = marker_items.get(managed_idx)
+            if marker_item is None:
+                marker_tag = f"marker_{managed_idx}" # Tag uses managed_idx
+                item_id = self.canvas.create_rectangle(
+                    abs_canvas_x - marker_radius, abs_canvas_y - marker_radius,
+                    abs_canvas_x + marker_radius, abs_canvas_y + marker_radius,
+                    fill=color, outline=color, tags=(marker_tag, "marker")
+                )
+                marker_items[managed_idx] = [item_id, color, True, (abs_canvas_x, abs_canvas_y)]
+                self._marker_item_meta[item_id] = managed_idx
+                continue
+            # Each Tk call below invalidates part of the canvas, so only issue the ones that change something
+            if marker_item[3] != (abs_canvas_x, abs_canvas_y):
+                self.canvas.coords(marker_item[0],
+                                   abs_canvas_x - marker_radius, abs_canvas_y - marker_radius,
+                                   abs_canvas_x + marker_radius, abs_canvas_y + marker_radius)
+                marker_item[3] = (abs_canvas_x, abs_canvas_y)
+            if marker_item[1] != color: # Column mapping changed (e.g. new Excel file)
+                self.canvas.itemconfigure(marker_item[0], fill=color, outline=color)
+                marker_item[1] = color
+            if not marker_item[2]:
+                self.canvas.itemconfigure(marker_item[0], state="normal")
+                marker_item[2] = True
 
 
     def _get_pdf_image_offset_on_canvas(self):
         """Returns the (x, y) offset of the 'pdf_image' item on the canvas."""
     def _draw_placed_signatures(self):
         self.canvas.delete("signature_instance") # Delete all signature instances
+        self._sig_item_meta.clear()
         if not self.signature_mode_active.get() or not self.pdf_doc:
             return
 
         for idx, sig_data in enumerate(self.placed_signatures_data):
             # Get relative canvas parameters (x,y,w,h) for the signature
-            relative_canvas_params = self._pdf_rect_to_relative_canvas_rect_params(sig_data['pdf_rect_pts'])
+            relative_canvas_params = self._pdf_rect_to_relative_canvas_rect_params(sig_data.pdf_rect_pts)
             if relative_canvas_params:
                 rel_canvas_x, rel_canvas_y, canvas_w, canvas_h = relative_canvas_params
 
@@ -1028,22 +1558,23 @@ class PDFBatchApp:
                 # Ensure width and height are positive for PIL resize
                 if canvas_w <= 0 or canvas_h <= 0: continue
 
-                pil_img_original = self.loaded_signature_pil_images[sig_data['pil_image_idx']][0]
+                pil_img_original = self.loaded_signature_pil_images[sig_data.pil_image_idx][0]
                 # Resize PIL image for current canvas zoom/size
                 # Use ANTIALIAS for better quality if Pillow version supports it, otherwise RESAMPLE.LANCZOS
                 try:
                     resample_filter = Image.Resampling.LANCZOS if hasattr(Image, "Resampling") else Image.ANTIALIAS
                     pil_img_resized = pil_img_original.resize((int(canvas_w), int(canvas_h)), resample_filter)
                     # # DEBUG for resize
-                    # if self.selected_placed_signature_idx.get() == idx and self._resize_data.get("sig_idx") == idx : # A bit redundant with active check
-                    #     print(f"DEBUG DRAW SIG (RESIZING): idx={idx}, pdf_rect_pts={sig_data['pdf_rect_pts']}")
+                    # if self.selected_placed_signature_idx.get() == idx and self._resize_data.sig_idx == idx : # A bit redundant with active check
+                    #     print(f"DEBUG DRAW SIG (RESIZING): idx={idx}, pdf_rect_pts={sig_data.pdf_rect_pts}")
                     #     print(f"  Canvas params for resize: x={canvas_x:.2f}, y={canvas_y:.2f}, w={canvas_w:.2f}, h={canvas_h:.2f}")
                 except Exception as e:
                     print(f"Error resizing signature image for canvas: {e}")
                     continue
                 
-                sig_data['tk_photo'] = ImageTk.PhotoImage(pil_img_resized) # Keep reference
-                sig_data['canvas_item_id'] = self.canvas.create_image(abs_canvas_x, abs_canvas_y, anchor=tk.NW, image=sig_data['tk_photo'], tags=("signature_instance", f"sig_{idx}"))
+                sig_data.tk_photo = ImageTk.PhotoImage(pil_img_resized) # Keep reference
+                sig_data.canvas_item_id = self.canvas.create_image(abs_canvas_x, abs_canvas_y, anchor=tk.NW, image=sig_data.tk_photo, tags=("signature_instance", f"sig_{idx}"))
+                self._sig_item_meta[sig_data.canvas_item_id] = idx
         # Selection highlights are now handled exclusively by _redraw_selection_highlights()
         self._redraw_selection_highlights() # Ensure highlights are correct after redrawing all signatures
 
@@ -1093,6 +1624,8 @@ class PDFBatchApp:
             return
 
         self.pdf_path.set(path)
+        _bidi_display.cache_clear() # Start the new document with empty text caches
+        _text_width_pt.cache_clear() # Also drops references to fonts of earlier runs
         filename = os.path.basename(path) if path else "(No file selected)"
         self.pdf_display_var.set(filename)
         # For CTkEntry, if state is disabled, we might need to temporarily enable to set, then disable
@@ -1101,7 +1634,12 @@ class PDFBatchApp:
         # self.pdf_display_entry.insert(0, filename)
         # self.pdf_display_entry.configure(state="disabled")
         try:
-            self.pdf_doc = fitz.open(path)
+            self._page_image_cache.clear() # Rendered pages belong to the previous document
+            self._page_image_cache_pixels = 0
+            self._last_page_pixmap = None
+            with open(path, "rb") as template_file:
+                self._template_pdf_bytes = template_file.read() # Kept for output copies; the file is not read again
+            self.pdf_doc = fitz.open(stream=self._template_pdf_bytes, filetype="pdf")
             if not self.pdf_doc.page_count > 0:
                 messagebox.showerror("Error", "The PDF file is empty.")
                 self.pdf_doc = None
@@ -1169,11 +1707,12 @@ class PDFBatchApp:
             return
         path = filedialog.askopenfilename(
             title="Select Excel File",
-            filetypes=(("Excel files", "*.xlsx *.xls"), ("All files", "*.*"))
+            filetypes=(("Excel files", "*.xlsx *.xlsm *.xls"), ("All files", "*.*"))
         )
         if not path:
             return
         self.excel_path.set(path)
+        _bidi_display.cache_clear() # Cached strings belong to the previous workbook
         filename = os.path.basename(path) if path else "(No file selected)"
         self.excel_display_var.set(filename)
         # self.excel_display_entry.configure(state="normal")
@@ -1182,7 +1721,7 @@ class PDFBatchApp:
         # self.excel_display_entry.configure(state="disabled")
 
         try:
-            df = pd.read_excel(path, header=None) # Assume no header for simplicity, take first two columns
+            df = _read_excel_table(path) # Assume no header for simplicity, take first two columns
             if df.empty or df.shape[1] == 0:
                 messagebox.showerror("Error", "The Excel file is empty or contains no columns.")
                 self.excel_path.set("")
@@ -1192,10 +1731,12 @@ class PDFBatchApp:
                 # self.excel_display_entry.configure(state="normal"); self.excel_display_entry.delete(0, tk.END); self.excel_display_entry.insert(0, error_msg); self.excel_display_entry.configure(state="disabled")
 
                 self.coords_pdf = []
+                self._next_unassigned_idx = 0
                 self.managed_columns.clear()
                 return
             
             self.num_excel_cols = df.shape[1] # Number of original Excel columns
+            _preload_font_family_index() # Generating is the next step; have the font index ready by then
             
             # Get header values from the first row for display names
             header_values = []
@@ -1216,6 +1757,7 @@ class PDFBatchApp:
                 })
 
             self.coords_pdf = [None] * len(self.managed_columns)
+            self._next_unassigned_idx = 0
             # Initialize status vars when Excel is loaded
             self.col_status_vars = [tk.StringVar(value="✖") for _ in range(len(self.managed_columns))] # Already done in _build_dynamic_coord_controls
             self.col_alignment_vars = [tk.StringVar(value=TEXT_ALIGNMENTS[0]) for _ in range(len(self.managed_columns))]
@@ -1251,6 +1793,7 @@ class PDFBatchApp:
             else:
                  self.status_label.configure(text=f"Excel loaded ({len(self.managed_columns)} fields). Load PDF to start.")
             self.excel_data_preview = df
+            self._excel_cell_strings = _cell_string_table(df) # Shared by the preview rows and the batch
             self.preview_row_index.set(0) 
             self._update_preview_row_display_and_buttons() # Update buttons AFTER df is set
             # Try to update preview if PDF is also loaded and at least one coord is set
@@ -1269,6 +1812,7 @@ class PDFBatchApp:
             self._update_preview_row_display_and_buttons()
             self._build_dynamic_coord_controls()
             self.excel_data_preview = None
+            self._excel_cell_strings = None
 
     def select_output_dir(self):
         path = filedialog.askdirectory(title="Select Output Folder")
@@ -1332,17 +1876,12 @@ class PDFBatchApp:
         return (pdf_x_pt, pdf_y_pt_from_bottom)
 
     def _on_canvas_b1_press(self, event):
-        current_item_tuple = self.canvas.find_withtag(tk.CURRENT)
-        if current_item_tuple:
-            item_id = current_item_tuple[0]
-            tags = self.canvas.gettags(item_id)
-            # If a resize handle, signature, or marker is pressed, their specific handlers
-            # (_on_resize_handle_press, on_placed_signature_press, on_marker_press)
-            # will be called due to their tag bindings and should manage _item_drag_active.
-            # This general handler should just yield to them by breaking early.
-            if RESIZE_HANDLE_TAG in tags or "signature_instance" in tags or "marker" in tags:
-                # print(f"DEBUG: _on_canvas_b1_press: Clicked on interactive item with tags {tags}. Returning break.")
-                return "break"
+        # Tk runs item (tag) bindings before this widget binding. If a resize handle, signature, or marker
+        # was pressed, its handler (_on_resize_handle_press, on_placed_signature_press, on_marker_press)
+        # has already set _item_press_active, so yield to it without asking Tk what is under the cursor.
+        if self._item_press_active:
+            self._item_press_active = False # Consumed; the next press is classified afresh
+            return "break"
 
         # If we reach here, the click was on the canvas background, not an interactive item.
         # Proceed with canvas pan or click-to-place logic.
@@ -1351,8 +1890,7 @@ class PDFBatchApp:
             return "break" # Still break if no PDF, to prevent errors
 
         # Store press coordinates and prepare for potential pan
-        self._pan_data["press_x"] = self.canvas.canvasx(event.x) # Use canvas coords
-        self._pan_data["press_y"] = self.canvas.canvasy(event.y) # Use canvas coords
+        self._pan_data["press_x"], self._pan_data["press_y"] = self._event_canvas_xy(event) # Use canvas coords
         self._pan_data["is_potential_pan_or_click"] = True
         self._pan_data["has_dragged_for_pan"] = False
         self.canvas.scan_mark(event.x, event.y) # For scan_dragto, event.x/y is fine
@@ -1361,19 +1899,18 @@ class PDFBatchApp:
     def _on_canvas_b1_motion(self, event):
         # print(f"DEBUG: _on_canvas_b1_motion entered. _drag_data: {self._drag_data}, _pan_data: {self._pan_data}") # Reduced verbosity
         # Prioritize resize check
-        if self._resize_data["active"]:            
-            sig_idx = self._resize_data["sig_idx"]
+        if self._resize_data.active:            
+            sig_idx = self._resize_data.sig_idx
             sig_data = self.placed_signatures_data[sig_idx]
-            # Ensure original_pdf_rect is a valid Rect object before proceeding
-            if not isinstance(self._resize_data["original_pdf_rect"], fitz.Rect):
-                print("CRITICAL: _on_canvas_b1_motion - original_pdf_rect is not a Rect object during resize. Bailing.") # Kept for critical error
+            # Ensure original_pdf_rect was captured on press before proceeding
+            if self._resize_data.original_pdf_rect is None:
+                print("CRITICAL: _on_canvas_b1_motion - original_pdf_rect is not set during resize. Bailing.") # Kept for critical error
                 return "break" # Or handle error appropriately
-            original_pdf_rect = self._resize_data["original_pdf_rect"]
-            aspect_ratio = self._resize_data["aspect_ratio"]
-            handle_type = self._resize_data["handle_type"]
+            original_pdf_rect = self._resize_data.original_pdf_rect
+            aspect_ratio = self._resize_data.aspect_ratio
+            handle_type = self._resize_data.handle_type
 
-            current_mouse_x_canvas = self.canvas.canvasx(event.x)
-            current_mouse_y_canvas = self.canvas.canvasy(event.y)
+            current_mouse_x_canvas, current_mouse_y_canvas = self._event_canvas_xy(event)
 
             # Convert current mouse to PDF coordinates (y from top)
             pdf_pos_result = self._canvas_pos_to_pdf_pos_tl(current_mouse_x_canvas, current_mouse_y_canvas)
@@ -1381,55 +1918,14 @@ class PDFBatchApp:
                 return "break" # Mouse is outside the PDF image area, do nothing further for resize.
             current_mouse_pdf_x, current_mouse_pdf_y = pdf_pos_result
 
-            new_rect = fitz.Rect(original_pdf_rect.x0, original_pdf_rect.y0, original_pdf_rect.x1, original_pdf_rect.y1)
-            min_pdf_dim = 10 # Minimum dimension in PDF points
-            # Store w,h before aspect ratio for debugging
-            debug_w_before_aspect, debug_h_before_aspect = 0,0            
-
-            # Calculate new dimensions based on mouse and fixed corner, then apply aspect ratio
-            if handle_type == "br": # Bottom-Right handle; Top-Left is fixed
-                w = current_mouse_pdf_x - new_rect.x0
-                h = current_mouse_pdf_y - new_rect.y0
-                if aspect_ratio > 0:
-                    if w / aspect_ratio > h: 
-                        h = w / aspect_ratio # Adjust height based on width
-                    else: w = h * aspect_ratio # Adjust width based on height
-                new_rect.x1 = new_rect.x0 + max(w, min_pdf_dim)
-                new_rect.y1 = new_rect.y0 + max(h, min_pdf_dim)
-
-            elif handle_type == "tl": # Top-Left handle; Bottom-Right is fixed
-                w = new_rect.x1 - current_mouse_pdf_x
-                h = new_rect.y1 - current_mouse_pdf_y
-                if aspect_ratio > 0:
-                    if w / aspect_ratio > h: h = w / aspect_ratio
-                    else: w = h * aspect_ratio
-                new_rect.x0 = new_rect.x1 - max(w, min_pdf_dim)
-                new_rect.y0 = new_rect.y1 - max(h, min_pdf_dim)
-
-            elif handle_type == "tr": # Top-Right handle; Bottom-Left is fixed
-                w = current_mouse_pdf_x - new_rect.x0
-                h = new_rect.y1 - current_mouse_pdf_y
-                if aspect_ratio > 0:
-                    if w / aspect_ratio > h: h = w / aspect_ratio
-                    else: w = h * aspect_ratio
-                new_rect.x1 = new_rect.x0 + max(w, min_pdf_dim)
-                new_rect.y0 = new_rect.y1 - max(h, min_pdf_dim)
-
-            elif handle_type == "bl": # Bottom-Left handle; Top-Right is fixed
-                w = new_rect.x1 - current_mouse_pdf_x
-                h = current_mouse_pdf_y - new_rect.y0
-                if aspect_ratio > 0:
-                    if w / aspect_ratio > h: h = w / aspect_ratio
-                    else: w = h * aspect_ratio
-                new_rect.x0 = new_rect.x1 - max(w, min_pdf_dim)
-                new_rect.y1 = new_rect.y0 + max(h, min_pdf_dim)
+            new_rect = fitz.Rect(_compute_resized_rect(original_pdf_rect, current_mouse_pdf_x, current_mouse_pdf_y,
+                                                       aspect_ratio, handle_type))
             # # DEBUG RESIZE MOTION: sig_idx={sig_idx}, handle={handle_type}
             # # print(f"  Original PDF Rect: {original_pdf_rect}")
             # # print(f"  Mouse PDF (TL): {current_mouse_pdf_x:.2f}, {current_mouse_pdf_y:.2f}")
-            # # print(f"  Calc w={w:.2f}, h={h:.2f} (after aspect, before max with min_pdf_dim)") # This w,h is for the specific handle logic
             # # print(f"  New PDF Rect: x0={new_rect.x0:.2f}, y0={new_rect.y0:.2f}, x1={new_rect.x1:.2f}, y1={new_rect.y1:.2f}, W={new_rect.width:.2f}, H={new_rect.height:.2f}")
             
-            sig_data['pdf_rect_pts'] = new_rect
+            sig_data.pdf_rect_pts = new_rect
             self._draw_placed_signatures() # Redraws signature and its selection/handles
             # Update status bar or any display of size if needed
             # self.status_label.config(text=f"Resizing: W:{new_rect.width:.1f}, H:{new_rect.height:.1f} pt")
@@ -1452,8 +1948,7 @@ class PDFBatchApp:
                 if not self._pan_data["has_dragged_for_pan"]: # Check only once if it becomes a drag
                     # Check if movement exceeds threshold for panning
                     # Use canvas coordinates for calculating drag distance
-                    current_canvas_x = self.canvas.canvasx(event.x)
-                    current_canvas_y = self.canvas.canvasy(event.y)
+                    current_canvas_x, current_canvas_y = self._event_canvas_xy(event)
                     dx = abs(current_canvas_x - self._pan_data["press_x"])
                     dy = abs(current_canvas_y - self._pan_data["press_y"])
 
@@ -1464,15 +1959,16 @@ class PDFBatchApp:
                     if self.pdf_doc: # Ensure PDF is loaded before trying to pan
                         self.canvas.config(cursor="fleur")
                         self.canvas.scan_dragto(event.x, event.y, gain=1) # event.x/y is fine for scan_dragto
+                        self._refresh_canvas_scroll_offsets()
 
     def _on_canvas_b1_release(self, event):
         # If a marker drag was just completed, self._drag_data["item"] would have been cleared by on_marker_release.
         # We primarily care about actions initiated by _on_canvas_b1_press here.
-        # # print(f"DEBUG CANVAS B1 RELEASE: _resize_data[active]={self._resize_data['active']}, _item_drag_active={self._item_drag_active}, _drag_data={self._drag_data}, _pan_data[is_potential]={self._pan_data['is_potential_pan_or_click']}")
+        # # print(f"DEBUG CANVAS B1 RELEASE: _resize_data.active={self._resize_data.active}, _item_drag_active={self._item_drag_active}, _drag_data={self._drag_data}, _pan_data[is_potential]={self._pan_data['is_potential_pan_or_click']}")
 
-        if self._resize_data["active"]:
-            sig_idx = self._resize_data["sig_idx"] # This was part of the if block
-            self._resize_data["active"] = False 
+        if self._resize_data.active:
+            sig_idx = self._resize_data.sig_idx # This was part of the if block
+            self._resize_data.active = False 
             self._item_drag_active = False 
             self.canvas.config(cursor="")
             # Final update of size in status or data model if needed
@@ -1514,6 +2010,15 @@ class PDFBatchApp:
             # Do NOT clear _drag_data here if it was set by on_placed_signature_press for selection,
             # as on_placed_signature_release will handle it.            
             
+    def _find_next_unassigned_idx(self):
+        """Returns the first managed_idx without a placement (-1 if all are placed), resuming from the last answer."""
+        coords_pdf = self.coords_pdf
+        idx = self._next_unassigned_idx
+        while idx < len(coords_pdf) and coords_pdf[idx] is not None and coords_pdf[idx].get('coord') is not None:
+            idx += 1
+        self._next_unassigned_idx = idx
+        return idx if idx < len(coords_pdf) else -1
+
     def _execute_place_marker_at_click(self, event):
         if not self.pdf_doc: # This check is good to have here too
             return
@@ -1524,12 +2029,7 @@ class PDFBatchApp:
             idx_to_update = self.active_coord_to_set_idx
         else: # No specific column chosen, try to find the next unassigned one
             if self.managed_columns and self.coords_pdf: # Check against managed_columns
-                # Find first unassigned coordinate (where item is None or item['coord'] is None)
-                next_unassigned_idx = -1
-                for i, item_data in enumerate(self.coords_pdf): # Iterate through coords_pdf (which matches managed_columns length)
-                    if item_data is None or item_data.get('coord') is None:
-                        next_unassigned_idx = i
-                        break
+                next_unassigned_idx = self._find_next_unassigned_idx()
                 if next_unassigned_idx != -1:
                     idx_to_update = next_unassigned_idx
                 else: # All coordinates are assigned
@@ -1541,8 +2041,7 @@ class PDFBatchApp:
 
         if idx_to_update != -1:
             # Convert event coordinates to canvas coordinates (accounts for scrolling)
-            canvas_x = self.canvas.canvasx(event.x)
-            canvas_y = self.canvas.canvasy(event.y)
+            canvas_x, canvas_y = self._event_canvas_xy(event)
 
             pdf_image_x_offset, pdf_image_y_offset = self._get_pdf_image_offset_on_canvas()
             pdf_image_right_boundary = pdf_image_x_offset + self.image_on_canvas_width_px
@@ -1568,11 +2067,7 @@ class PDFBatchApp:
                 self.col_status_vars[idx_to_update].set(f"✔ (P.{page_num_for_status + 1})")
             
             # Check if there's a next unassigned coordinate
-            next_unassigned_idx_for_status = -1
-            for i, item_data in enumerate(self.coords_pdf): # Re-check after update
-                if item_data is None or item_data.get('coord') is None:
-                    next_unassigned_idx_for_status = i
-                    break
+            next_unassigned_idx_for_status = self._find_next_unassigned_idx()
             
             current_page_for_status = self.current_pdf_page_num.get() + 1
             field_display_name = self.managed_columns[idx_to_update]['display_name']
@@ -1595,8 +2090,7 @@ class PDFBatchApp:
             self.status_label.configure(text="Please select a signature image from the list to place.")
             return
 
-        canvas_x_click = self.canvas.canvasx(event.x)
-        canvas_y_click = self.canvas.canvasy(event.y)
+        canvas_x_click, canvas_y_click = self._event_canvas_xy(event)
 
         if not (0 <= canvas_x_click <= self.image_on_canvas_width_px and \
                 0 <= canvas_y_click <= self.image_on_canvas_height_px):
@@ -1615,13 +2109,8 @@ class PDFBatchApp:
 
         pdf_rect = fitz.Rect(pdf_tl_x_pt, pdf_tl_y_pt, pdf_tl_x_pt + sig_width_pt, pdf_tl_y_pt + sig_height_pt)
 
-        new_sig_data = {
-            'pil_image_idx': active_pil_idx,
-            'pdf_rect_pts': pdf_rect,
-            'aspect_ratio': aspect_ratio,
-            'selected': False # Initially not selected after placement
-        }
-        # # print(f"DEBUG: _execute_place_signature_at_click: placing signature with pil_image_idx {new_sig_data['pil_image_idx']}")
+        new_sig_data = PlacedSignature(active_pil_idx, pdf_rect, aspect_ratio) # Initially not selected after placement
+        # # print(f"DEBUG: _execute_place_signature_at_click: placing signature with pil_image_idx {new_sig_data.pil_image_idx}")
         self.placed_signatures_data.append(new_sig_data)
         self._draw_placed_signatures() # Redraws all images and then calls _redraw_selection_highlights()
         
@@ -1631,45 +2120,49 @@ class PDFBatchApp:
         self.status_label.configure(text=f"Signature '{display_name}' added. Click to select or drag.")
     
     def on_marker_press(self, event):
+        self._item_press_active = True # Tells _on_canvas_b1_press this press belongs to an item
         item = self.canvas.find_withtag(tk.CURRENT) # Get item under cursor
         if not item:
             return
         item_id = item[0]
-        tags = self.canvas.gettags(item_id)
 
         # col_idx here refers to managed_idx
-        managed_idx_pressed = -1
-        for tag in tags:
-            if tag.startswith("marker_"):
-                try:
-                    managed_idx_pressed = int(tag.split("_")[1])
-                    break
-                except ValueError:
-                    continue
+        managed_idx_pressed = self._marker_item_meta.get(item_id, -1)
         if managed_idx_pressed == -1:
              return # Not a marker we are interested in
         col_idx = managed_idx_pressed # Use clearer variable name
 
         self._drag_data["item"] = item_id # This is the canvas item_id of the marker
         self._drag_data["col_idx"] = col_idx
-        self._drag_data["x"] = self.canvas.canvasx(event.x)
-        self._drag_data["y"] = self.canvas.canvasy(event.y)
+        self._drag_data["x"], self._drag_data["y"] = self._event_canvas_xy(event)
         self.active_coord_to_set_idx = None # Cancel click-to-set mode
         self._item_drag_active = True # Signal that an item drag has started
 
-        # Find all items belonging to this marker group (text and rectangle)
-        specific_tag_for_group = f"marker_{managed_idx_pressed}"
-        items_in_group = self.canvas.find_withtag(specific_tag_for_group)
-        self._drag_data["items_to_move_together"] = list(items_in_group)
+        # All items belonging to this marker group (rectangle and preview text)
+        self._drag_data["items_to_move_together"] = [group_item[0] for group_item in
+                                                     (self._marker_items.get(col_idx), self.preview_text_items.get(col_idx))
+                                                     if group_item is not None]
 
     def on_marker_motion(self, event):
         # print(f"DEBUG MARKER MOTION: drag_data={self._drag_data}")
         if not self._drag_data["item"]:
             return # No item being dragged
 
-        current_x = self.canvas.canvasx(event.x)
-        current_y = self.canvas.canvasy(event.y)
-        
+        # Only remember the latest pointer position; the move itself is applied at most once per
+        # MARKER_DRAG_FRAME_MS, however fast the motion events arrive.
+        self._drag_data["pending_x"], self._drag_data["pending_y"] = self._event_canvas_xy(event)
+        if self._marker_drag_move_timer is None:
+            self._marker_drag_move_timer = self.master.after(MARKER_DRAG_FRAME_MS, self._flush_marker_drag_move)
+        return "break" # Consume event to prevent canvas pan while dragging marker
+
+    def _flush_marker_drag_move(self):
+        """Moves the dragged marker group to the latest pointer position recorded by on_marker_motion."""
+        self._marker_drag_move_timer = None # Reset timer ID
+        if not self._drag_data.get("item") or "pending_x" not in self._drag_data:
+            return # Drag already finished
+        current_x = self._drag_data.pop("pending_x")
+        current_y = self._drag_data.pop("pending_y")
+
         dx = current_x - self._drag_data["x"]
         dy = current_y - self._drag_data["y"]
 
@@ -1683,10 +2176,24 @@ class PDFBatchApp:
             
         self._drag_data["x"] = current_x
         self._drag_data["y"] = current_y
-
-        # Update PDF coordinates
+        # The group moved without _draw_markers/_update_text_preview knowing: drop their cached positions
+        col_idx = self._drag_data.get("col_idx")
+        if col_idx in self._marker_items:
+            self._marker_items[col_idx][3] = None
+        if col_idx in self.preview_text_items:
+            self.preview_text_items[col_idx][2] = None
+
+        # Syncing the PDF coordinates (several Tcl queries) is throttled further, to one pass per MARKER_DRAG_SYNC_MS.
+        if self._marker_drag_sync_timer is None:
+            self._marker_drag_sync_timer = self.master.after(MARKER_DRAG_SYNC_MS, self._sync_dragged_marker_coords)
+
+    def _sync_dragged_marker_coords(self):
+        """Writes the dragged marker's current position into coords_pdf (throttled from _flush_marker_drag_move)."""
+        self._marker_drag_sync_timer = None # Reset timer ID
+        item_id_dragged = self._drag_data.get("item")
+        if not item_id_dragged:
+            return # Drag ended before the timer fired; release already stored the final position
         # Get the canvas coordinates of the dragged item's reference point
-        item_id_dragged = self._drag_data["item"]
         marker_coords_canvas = self.canvas.coords(item_id_dragged)
         item_type = self.canvas.type(item_id_dragged)
 
@@ -1701,7 +2208,7 @@ class PDFBatchApp:
             new_canvas_ref_y = (marker_coords_canvas[1] + marker_coords_canvas[3]) / 2
         else:
             print(f"Warning: Dragged 'marker' item is of unexpected type: {item_type}")
-            return "break"
+            return
 
         pdf_coords = self._canvas_coords_to_pdf_coords(new_canvas_ref_x, new_canvas_ref_y)
 
@@ -1714,12 +2221,16 @@ class PDFBatchApp:
                 self.coords_pdf[current_managed_idx] = {'page_num': self.current_pdf_page_num.get(), 'coord': pdf_coords}
             # DO NOT call self._update_text_preview() here. It will be called on release.
             # The text item is moved directly by self.canvas.move().
-            
-        return "break" # Consume event to prevent canvas pan while dragging marker
 
     def on_marker_release(self, event):
         if not self._drag_data["item"]:
             return
+        if self._marker_drag_move_timer is not None: # Apply the last pointer position before reading it back
+            self.master.after_cancel(self._marker_drag_move_timer)
+            self._flush_marker_drag_move()
+        if self._marker_drag_sync_timer is not None: # The final position is stored below
+            self.master.after_cancel(self._marker_drag_sync_timer)
+            self._marker_drag_sync_timer = None
         # Final update after drag, ensuring the latest position is used
         # This is mostly redundant if on_marker_motion updates correctly, but good for safety
         item_id_released = self._drag_data["item"]
@@ -1763,21 +2274,11 @@ class PDFBatchApp:
             self._update_text_preview() # Will iterate through all placements
 
     def on_marker_double_click(self, event):
+        self._item_press_active = True # Second press of a double-click: on_marker_press does not run for it
         item = self.canvas.find_withtag(tk.CURRENT) # Get item under cursor
         if not item:
             return
-        item_id = item[0]
-        tags = self.canvas.gettags(item_id)
-
-        managed_idx_dc = -1
-        for tag in tags:
-            if tag.startswith("marker_"):
-                try:
-                    managed_idx_dc = int(tag.split("_")[1])
-                    break
-                except ValueError:
-                    continue
-        
+        managed_idx_dc = self._marker_item_meta.get(item[0], -1)
         if managed_idx_dc != -1 and 0 <= managed_idx_dc < len(self.is_rtl_vars): # Check if managed_idx_dc is valid
             current_rtl_var = self.is_rtl_vars[managed_idx_dc] # Get the BooleanVar for this managed column
             current_rtl_var.set(not current_rtl_var.get())
@@ -1787,6 +2288,7 @@ class PDFBatchApp:
 
 
     def on_placed_signature_press(self, event):
+        self._item_press_active = True # Tells _on_canvas_b1_press this press belongs to an item
         # current_tags = self.canvas.gettags(tk.CURRENT) # Debug
         # print(f"DEBUG: on_placed_signature_press: event on item with tags {current_tags}") # Debug
         
@@ -1794,23 +2296,8 @@ class PDFBatchApp:
         if not item_tuple: return
         item_id = item_tuple[0]
         # Find which signature index this item_id corresponds to.
-        # The item_id here is the one that received the press event.        
-        tags = self.canvas.gettags(item_id)
-
-        sig_idx = -1
-        for tag in tags:
-            if tag.startswith("sig_"):
-                try:
-                    sig_idx = int(tag.split("_")[1])
-                    # Ensure this sig_idx is valid for placed_signatures_data
-                    if 0 <= sig_idx < len(self.placed_signatures_data):
-                        break
-                    # If int() conversion succeeded but index is out of bounds
-                    sig_idx = -1 # Reset/confirm sig_idx is -1
-                    continue # Move to the next tag
-                except ValueError:
-                    # If int() conversion failed
-                    continue # Move to the next tag
+        # The item_id here is the one that received the press event; Tk already did the hit-test.
+        sig_idx = self._sig_item_meta.get(item_id, -1)
         
         if sig_idx != -1 and 0 <= sig_idx < len(self.placed_signatures_data):
             self._select_placed_signature(sig_idx)
@@ -1820,10 +2307,9 @@ class PDFBatchApp:
             # We use 'item_id' (the one that received the event) for dragging.
             self._drag_data["item"] = item_id 
             self._drag_data["sig_idx"] = sig_idx # Index in self.placed_signatures_data
-            self._drag_data["x"] = self.canvas.canvasx(event.x) # Store initial canvas coords
-            self._drag_data["y"] = self.canvas.canvasy(event.y)
+            self._drag_data["x"], self._drag_data["y"] = self._event_canvas_xy(event) # Store initial canvas coords
             self._item_drag_active = True # Signal that an item drag has started
-            # # print(f"DEBUG: on_placed_signature_press: Dragging item {item_id} (sig_idx {sig_idx}). Stored canvas_item_id in data: {self.placed_signatures_data[sig_idx].get('canvas_item_id')}") # Debug
+            # # print(f"DEBUG: on_placed_signature_press: Dragging item {item_id} (sig_idx {sig_idx}). Stored canvas_item_id in data: {self.placed_signatures_data[sig_idx].canvas_item_id}") # Debug
             # The 'cursor' option is not valid for canvas items via itemconfig.
             # self.canvas.itemconfig(actual_image_item_id_for_drag, cursor="fleur")
 
@@ -1841,8 +2327,7 @@ class PDFBatchApp:
         sig_data = self.placed_signatures_data[sig_idx]
         dragged_image_canvas_id = self._drag_data["item"] # The ID of the image being dragged
         
-        current_x_canvas = self.canvas.canvasx(event.x)
-        current_y_canvas = self.canvas.canvasy(event.y)
+        current_x_canvas, current_y_canvas = self._event_canvas_xy(event)
         # # print(f"DEBUG: on_placed_signature_motion: sig_idx={sig_idx}, current_x_canvas={current_x_canvas}, current_y_canvas={current_y_canvas}")
         
         dx_canvas = current_x_canvas - self._drag_data["x"]
@@ -1856,13 +2341,13 @@ class PDFBatchApp:
         
         pdf_tl_x_pt, pdf_tl_y_pt = self._canvas_pos_to_pdf_pos_tl(new_canvas_x0, new_canvas_y0)
         
-        original_width_pt = sig_data['pdf_rect_pts'].width
-        original_height_pt = sig_data['pdf_rect_pts'].height
+        original_width_pt = sig_data.pdf_rect_pts.width
+        original_height_pt = sig_data.pdf_rect_pts.height
 
-        sig_data['pdf_rect_pts'].x0 = pdf_tl_x_pt
-        sig_data['pdf_rect_pts'].y0 = pdf_tl_y_pt
-        sig_data['pdf_rect_pts'].x1 = pdf_tl_x_pt + original_width_pt
-        sig_data['pdf_rect_pts'].y1 = pdf_tl_y_pt + original_height_pt
+        sig_data.pdf_rect_pts.x0 = pdf_tl_x_pt
+        sig_data.pdf_rect_pts.y0 = pdf_tl_y_pt
+        sig_data.pdf_rect_pts.x1 = pdf_tl_x_pt + original_width_pt
+        sig_data.pdf_rect_pts.y1 = pdf_tl_y_pt + original_height_pt
         
         self._drag_data["x"] = current_x_canvas
         self._drag_data["y"] = current_y_canvas
@@ -1888,10 +2373,11 @@ class PDFBatchApp:
         return "break" # Prevent event propagation
     def _redraw_selection_highlights(self):
         self.canvas.delete(RESIZE_HANDLE_TAG) # Explicitly delete all old resize handles first
+        self._handle_meta.clear()
         self.canvas.delete("selection_highlight_tag") # Use a dedicated tag for highlights
         for idx, sig_data in enumerate(self.placed_signatures_data):
-            if sig_data.get('selected', False): # No need to check for canvas_item_id, pdf_rect_pts is source
-                canvas_params = self._pdf_rect_to_relative_canvas_rect_params(sig_data['pdf_rect_pts'])
+            if sig_data.selected: # No need to check for canvas_item_id, pdf_rect_pts is source
+                canvas_params = self._pdf_rect_to_relative_canvas_rect_params(sig_data.pdf_rect_pts)
                 if canvas_params: # These are relative to the PDF image
                     rel_canvas_x, rel_canvas_y, canvas_w, canvas_h = canvas_params
                     
@@ -1905,8 +2391,8 @@ class PDFBatchApp:
                         tags=("selection_highlight_tag", f"highlight_for_sig_{idx}", "no_drag") # no_drag to prevent interference
                     )
                     # If the image item itself needs to be raised (e.g., if signatures can overlap)
-                    if 'canvas_item_id' in sig_data and sig_data['canvas_item_id']:
-                        self.canvas.tag_raise(sig_data['canvas_item_id'])
+                    if sig_data.canvas_item_id:
+                        self.canvas.tag_raise(sig_data.canvas_item_id)
                         # Also raise the highlight so it's on top of the raised item or other items
                         self.canvas.tag_raise(f"highlight_for_sig_{idx}")
                     
@@ -1917,12 +2403,13 @@ class PDFBatchApp:
                         (abs_canvas_x + canvas_w, abs_canvas_y + canvas_h, "br"), (abs_canvas_x, abs_canvas_y + canvas_h, "bl")
                     ]
                     for h_x, h_y, h_type in handles_coords:
-                        self.canvas.create_rectangle(
+                        handle_item_id = self.canvas.create_rectangle(
                             h_x - RESIZE_HANDLE_OFFSET, h_y - RESIZE_HANDLE_OFFSET,
                             h_x + RESIZE_HANDLE_OFFSET, h_y + RESIZE_HANDLE_OFFSET,
                             fill=RESIZE_HANDLE_COLOR, outline="black", width=1,
                             tags=(RESIZE_HANDLE_TAG, f"handle_sig_{idx}", f"handle_{h_type}")
                         )
+                        self._handle_meta[handle_item_id] = (idx, h_type) # O(1) lookup in the handle event handlers
                         self.canvas.tag_raise(f"handle_sig_{idx}") # Raise handles above image/highlight
 
     def on_placed_signature_release(self, event): # Note: Size display update was removed from _redraw_selection_highlights
@@ -1932,14 +2419,14 @@ class PDFBatchApp:
             pass
         
         # If a resize was active, it should have been handled by _on_canvas_b1_release
-        if self._resize_data["active"]:
+        if self._resize_data.active:
             return # Already handled
 
         # Final position update might have happened in motion, but ensure UI reflects it
         sig_idx = self._drag_data.get("sig_idx")
         if sig_idx is not None and 0 <= sig_idx < len(self.placed_signatures_data):
             sig_data = self.placed_signatures_data[sig_idx]
-            self.status_label.configure(text=f"Signature moved. Width: {sig_data['pdf_rect_pts'].width:.1f}, Height: {sig_data['pdf_rect_pts'].height:.1f} pt")
+            self.status_label.configure(text=f"Signature moved. Width: {sig_data.pdf_rect_pts.width:.1f}, Height: {sig_data.pdf_rect_pts.height:.1f} pt")
         
         self._drag_data.clear() # Clear all drag data
         self._item_drag_active = False # Signal that item drag has ended
@@ -1949,7 +2436,7 @@ class PDFBatchApp:
     def _select_placed_signature(self, sig_idx_to_select, from_press_event=False):
         # from_press_event is a hint that this selection might be part of initiating a drag/resize
         for i, sig in enumerate(self.placed_signatures_data):
-            sig['selected'] = (i == sig_idx_to_select)
+            sig.selected = (i == sig_idx_to_select)
         self.selected_placed_signature_idx.set(sig_idx_to_select)
         # selected_sig_data = self.placed_signatures_data[sig_idx_to_select] # Vars removed
 
@@ -1989,15 +2476,37 @@ class PDFBatchApp:
         # (Button text update for Show/Hide can be added here if desired)
         self._update_text_preview() # Will iterate through all placements
 
-    def _update_text_preview(self):
-        # Clear existing preview text items
-        for item_id in self.preview_text_items:
+    def _get_display_row(self, row_idx):
+        """Returns the preview row's cell strings ("" for empty cells) from the table converted once per Excel load."""
+        return self._excel_cell_strings[row_idx] # Row view, no per-row pandas access
+
+    def _get_tk_font(self, family, size):
+        """Returns a cached tkFont.Font for (family, size); creating one is a font-system round trip."""
+        cache_key = (family, size)
+        tk_font = self._tk_font_cache.get(cache_key)
+        if tk_font is not None:
+            self._tk_font_cache.move_to_end(cache_key) # Mark as most recently used
+            return tk_font
+        tk_font = tkFont.Font(family=family, size=size) # Raises tk.TclError for unusable fonts
+        self._tk_font_cache[cache_key] = tk_font
+        if len(self._tk_font_cache) > TK_FONT_CACHE_SIZE:
+            self._tk_font_cache.popitem(last=False) # Evict least recently used (sizes change with zoom)
+        return tk_font
+
+    def _clear_text_preview_items(self):
+        for item_id, _, _, _ in self.preview_text_items.values():
             self.canvas.delete(item_id)
+            self._marker_item_meta.pop(item_id, None)
         self.preview_text_items.clear()
+
+    def _update_text_preview(self):
+        # Preview text items persist per managed column and are moved/reconfigured/hidden instead of recreated
+        preview_items = self.preview_text_items
         if not self.is_text_preview_active or \
            self.signature_mode_active.get() or \
            not self.pdf_doc or (self.excel_data_preview is None or self.excel_data_preview.empty) or \
            not self.coords_pdf or not self.managed_columns: # Check against managed_columns
+            self._clear_text_preview_items()
             return
 
         current_page_on_canvas = self.current_pdf_page_num.get()
@@ -2005,18 +2514,28 @@ class PDFBatchApp:
         if not (self.excel_data_preview is not None and \
                 0 <= current_row_idx < self.excel_data_preview.shape[0]):
             # # print(f"Preview row index {current_row_idx} is out of bounds.") # Debug
+            self._clear_text_preview_items()
             return # Invalid row index for preview
+        # Visible part of the canvas; fields whose text cannot reach it are hidden instead of laid out and painted
+        view_x0, view_y0 = self._canvas_xoff, self._canvas_yoff
+        view_x1 = view_x0 + self.canvas.winfo_width()
+        view_y1 = view_y0 + self.canvas.winfo_height()
+        pixels_per_point = self.canvas.winfo_fpixels("1p") # Tk font sizes are in points (>1.33 px each on HiDPI screens)
+        for managed_idx in [idx for idx in preview_items if idx >= len(self.managed_columns)]: # Removed columns
+            item_id = preview_items.pop(managed_idx)[0]
+            self.canvas.delete(item_id)
+            self._marker_item_meta.pop(item_id, None)
+        shown_indices = set()
         try:
             font_family = self.font_family_var.get()
             font_family_to_use = font_family
 
-            # Validate font_family_to_use once by trying to create a dummy font object.
-            try:
-                tkFont.Font(family=font_family_to_use, size=1) # Test creation with a dummy size
-            except tk.TclError:
+            # Validate font_family_to_use against the cached family whitelist (no Tk round-trip).
+            if font_family_to_use not in self._valid_tk_font_families:
                 print(f"Warning: Font family '{font_family_to_use}' not valid for Tkinter. Falling back to Arial.")
                 font_family_to_use = "Arial"
 
+            display_row = self._get_display_row(current_row_idx)
             for managed_idx in range(len(self.managed_columns)):
                 if not (managed_idx < len(self.coords_pdf) and \
                         managed_idx < len(self.is_rtl_vars) and \
@@ -2031,13 +2550,16 @@ class PDFBatchApp:
                 field_font_size_pt = self.col_font_size_vars[managed_idx].get()
                 if field_font_size_pt <= 0: continue
                 current_zoom = self.current_zoom_factor.get()
-                tkinter_preview_font_size_px = max(1, int(field_font_size_pt * TKINTER_FONT_SCALE_FACTOR * current_zoom))
+                # Snapped to even pixel sizes so zoom steps keep hitting the same cached, already-rasterized fonts
+                tkinter_preview_font_size_px = max(2, round(field_font_size_pt * TKINTER_FONT_SCALE_FACTOR * current_zoom / 2) * 2)
 
                 if coord_data_item and coord_data_item.get('coord') and \
                    coord_data_item.get('page_num') == current_page_on_canvas and \
                    original_excel_col_idx < self.excel_data_preview.shape[1]: # Check against original Excel columns
                     
-                    val_preview = str(self.excel_data_preview.iloc[current_row_idx, original_excel_col_idx]) if pd.notna(self.excel_data_preview.iloc[current_row_idx, original_excel_col_idx]) else ""
+                    val_preview = display_row[original_excel_col_idx]
+                    if not val_preview:
+                        continue # Nothing to draw for an empty cell
                     text_for_preview = val_preview 
                     
                     pdf_coord_tuple = coord_data_item['coord']
@@ -2053,9 +2575,17 @@ class PDFBatchApp:
                 relative_canvas_coords = self._pdf_coords_to_relative_canvas_coords(pdf_coord_tuple)
                 if relative_canvas_coords: # Check if conversion was successful
                     pdf_image_x_offset, pdf_image_y_offset = self._get_pdf_image_offset_on_canvas()
-                    canvas_coords = (relative_canvas_coords[0] + pdf_image_x_offset, 
-                                     relative_canvas_coords[1] + pdf_image_y_offset)
+                    canvas_coords = (round(relative_canvas_coords[0] + pdf_image_x_offset), # Whole pixels: no subpixel glyph placement
+                                     round(relative_canvas_coords[1] + pdf_image_y_offset))
                 
+                    # Conservative text extent: the Tk size is in points, so convert it to pixels and take 2x as the bound
+                    # for one glyph's width/height. The text lies left and/or right of the anchor (by alignment) and above it.
+                    text_em_px = 2 * tkinter_preview_font_size_px * pixels_per_point
+                    max_text_width_px = len(text_for_preview) * text_em_px
+                    if canvas_coords[0] + max_text_width_px < view_x0 or canvas_coords[0] - max_text_width_px > view_x1 or \
+                       canvas_coords[1] < view_y0 or canvas_coords[1] - text_em_px > view_y1:
+                        continue # Off-screen; hidden below and redrawn once scrolled into view
+
                     if current_alignment == "left":
                         anchor_val = tk.SW
                     elif current_alignment == "center":
@@ -2064,45 +2594,114 @@ class PDFBatchApp:
                         anchor_val = tk.SE
                     try:
                         # Configure the font object with the specific size for this field
-                        specific_marker_tag = f"marker_{managed_idx}"
-                        field_specific_font = tkFont.Font(family=font_family_to_use, size=tkinter_preview_font_size_px)
-                        item_id = self.canvas.create_text(canvas_coords[0], canvas_coords[1], text=text_for_preview,
-                                                         font=field_specific_font, anchor=anchor_val, fill="purple", tags=("preview_text_item", specific_marker_tag, "marker"))
-                        self.preview_text_items.append(item_id)
+                        field_specific_font = self._get_tk_font(font_family_to_use, tkinter_preview_font_size_px)
+                        preview_item = preview_items.get(managed_idx)
+                        if preview_item is None:
+                            specific_marker_tag = f"marker_{managed_idx}"
+                            item_id = self.canvas.create_text(canvas_coords[0], canvas_coords[1], text=text_for_preview,
+                                                             font=field_specific_font, anchor=anchor_val, fill="purple", tags=("preview_text_item", specific_marker_tag, "marker"))
+                            preview_items[managed_idx] = [item_id, True, canvas_coords, (text_for_preview, field_specific_font, anchor_val)]
+                            self._marker_item_meta[item_id] = managed_idx
+                        else: # Only touch what changed; every Tk call invalidates part of the canvas
+                            if preview_item[2] != canvas_coords:
+                                self.canvas.coords(preview_item[0], canvas_coords[0], canvas_coords[1])
+                                preview_item[2] = canvas_coords
+                            item_config = (text_for_preview, field_specific_font, anchor_val)
+                            if preview_item[3] != item_config:
+                                self.canvas.itemconfigure(preview_item[0], text=text_for_preview, font=field_specific_font, anchor=anchor_val)
+                                preview_item[3] = item_config
+                            if not preview_item[1]:
+                                self.canvas.itemconfigure(preview_item[0], state="normal")
+                                preview_item[1] = True
+                        shown_indices.add(managed_idx)
                     except tk.TclError as font_error:
                         print(f"Error creating Tkinter font '{font_family_to_use}' size {tkinter_preview_font_size_px} for preview: {font_error}")
                             
         except Exception as e:
             print(f"Error updating text preview: {e}") # Log error, don't crash
+        for managed_idx, preview_item in preview_items.items():
+            if preview_item[1] and managed_idx not in shown_indices: # Empty cell, unplaced or on another page
+                self.canvas.itemconfigure(preview_item[0], state="hidden")
+                preview_item[1] = False
 
-    def _insert_text_on_pdf_page(self, page, text_value, pdf_coord_tuple, font_family_name, font_file_path, font_size_pt, is_rtl, alignment, fitz_font_object):
-        """Helper function to insert text onto a PDF page."""
-        if pdf_coord_tuple is None:
+    def _save_output_in_background(self, doc, output_filepath, saved_status_text, success_message, error_title):
+        """
+        Serializes doc (with the current save options) and closes it, then hands the bytes to the
+        writer thread so a slow disk does not stall the UI. The result is reported by _poll_output_write.
+        """
+        try:
+            pdf_bytes = doc.tobytes(**self._output_save_options())
+        finally:
+            doc.close()
+        self.status_label.configure(text=f"Writing {os.path.basename(output_filepath)}...")
+        future = self._output_writer.submit(_write_bytes_to_file, output_filepath, pdf_bytes)
+        self._poll_output_write(future, saved_status_text, success_message, error_title)
+
+    def _poll_output_write(self, future, saved_status_text, success_message, error_title):
+        if not future.done():
+            self.master.after(BATCH_PROGRESS_POLL_MS, self._poll_output_write, future, saved_status_text, success_message, error_title)
             return
+        error = future.exception()
+        if error is not None:
+            self.status_label.configure(text="Error writing the output PDF.")
+            messagebox.showerror(error_title, str(error))
+            return
+        self.status_label.configure(text=saved_status_text)
+        messagebox.showinfo("Success", success_message)
 
-        text_to_render = get_display(text_value, base_dir='R' if is_rtl else 'L')
-        text_width_pt = fitz_font_object.text_length(text_to_render, fontsize=font_size_pt)
-
-        ref_x_pt = pdf_coord_tuple[0]
-        # PyMuPDF's insert_text uses y from top of page.
-        # self.coords_pdf stores y from bottom of page.
-        insertion_point_y_pt = (page.rect.height - pdf_coord_tuple[1]) - Y_OFFSET_PDF_OUTPUT
-
-        # Calculate final X based on alignment
-        if alignment == "left":
-            final_x_pt = ref_x_pt
-        elif alignment == "center":
-            final_x_pt = ref_x_pt - (text_width_pt / 2)
-        else: # "right"
-            final_x_pt = ref_x_pt - text_width_pt
-
-        page.insert_text((final_x_pt, insertion_point_y_pt),
-                           text_to_render,
-                           fontname=font_family_name,
-                           fontfile=font_file_path,
-                           fontsize=font_size_pt,
-                           color=DEFAULT_PDF_TEXT_COLOR,
-                           rotate=page.rotation)
+    def _get_fitz_font(self, font_family):
+        """
+        Returns (font file bytes, parsed fitz.Font) for font_family. The last family used is kept, so
+        repeated generations skip the file read and FreeType parse; selecting another family replaces it.
+        """
+        cached = self._fitz_font_cache
+        if cached is not None and cached[0] == font_family:
+            return cached[1], cached[2]
+        with open(_find_font_file(font_family), "rb") as font_file:
+            font_bytes = font_file.read()
+        fitz_font = fitz.Font(fontname=font_family, fontbuffer=font_bytes) # Raises for unusable font files
+        self._fitz_font_cache = (font_family, font_bytes, fitz_font)
+        return font_bytes, fitz_font
+
+    def _output_save_options(self):
+        """Returns the doc.save() keyword arguments for output PDFs, per the "Compact output" checkbox."""
+        return dict(COMPACT_SAVE_OPTIONS if self.compact_output.get() else FAST_SAVE_OPTIONS)
+
+    def _build_output_field_specs(self):
+        """
+        Collects every placed field into parallel NumPy arrays (one entry per field) so the
+        per-row output code only does array lookups. The Y-flip to PyMuPDF's top-left origin
+        does not depend on the row, so insertion Y is computed here once for all fields.
+        """
+        fields = []
+        for managed_idx in range(len(self.managed_columns)):
+            if not (managed_idx < len(self.coords_pdf) and \
+                    managed_idx < len(self.is_rtl_vars) and \
+                    managed_idx < len(self.col_alignment_vars) and \
+                    managed_idx < len(self.col_font_size_vars)):
+                continue # Should not happen if lists are synced
+            coord_data = self.coords_pdf[managed_idx]
+            if not coord_data or not coord_data.get('coord'):
+                continue
+            fields.append((self.managed_columns[managed_idx]['original_excel_col_idx'],
+                           coord_data['page_num'],
+                           coord_data['coord'][0], coord_data['coord'][1], # y from bottom of page
+                           self.col_font_size_vars[managed_idx].get(),
+                           TEXT_ALIGNMENT_FACTORS.get(self.col_alignment_vars[managed_idx].get(), 1.0),
+                           self.is_rtl_vars[managed_idx].get()))
+
+        page_nums = np.array([f[1] for f in fields], dtype=int)
+        page_heights = {p: self.pdf_doc.load_page(p).rect.height for p in set(page_nums.tolist())}
+        pdf_y = np.array([f[3] for f in fields], dtype=float)
+        return {
+            "excel_col": np.array([f[0] for f in fields], dtype=int),
+            "page_num": page_nums,
+            "x": np.array([f[2] for f in fields], dtype=float),
+            "insertion_y": np.array([page_heights[p] for p in page_nums.tolist()], dtype=float) - pdf_y - Y_OFFSET_PDF_OUTPUT,
+            "font_size": np.array([f[4] for f in fields], dtype=float),
+            "align_factor": np.array([f[5] for f in fields], dtype=float), # 0 left, 0.5 center, 1 right
+            "is_rtl": np.array([f[6] for f in fields], dtype=bool),
+        }
 
     def generate_output_pdfs(self):
         if self.signature_mode_active.get():
@@ -2111,6 +2710,8 @@ class PDFBatchApp:
         if not self.pdf_path.get() or not self.excel_path.get() or not self.output_dir.get():
             messagebox.showerror("Error", "Please ensure PDF template, Excel file, and Output folder are selected.")
             return
+        if self._batch_job is not None:
+            return # A batch is already running
 
         # Check if all defined columns have coordinates
         all_coords_set = True
@@ -2122,10 +2723,13 @@ class PDFBatchApp:
             return
 
         try:
-            df = pd.read_excel(self.excel_path.get(), header=None)
-            if df.shape[1] != self.num_excel_cols: # Consistency check
-                messagebox.showerror("Error", "The number of original columns in the Excel file has changed. Please reload.")
+            # The sheet parsed at load time is the one the preview shows; reading it again is the slowest step of a batch
+            df = self.excel_data_preview
+            if df is None or df.shape[1] != self.num_excel_cols: # Consistency check
+                messagebox.showerror("Error", "The Excel data is not loaded correctly. Please reload the Excel file.")
                 return
+            # All cells as strings, converted once at load; empty ones are "" and skip bidi/metrics/text insertion entirely
+            cell_strings = self._excel_cell_strings
 
             font_family_selected = self.font_family_var.get()
             # Global font_size removed. Will be per-column.
@@ -2134,70 +2738,127 @@ class PDFBatchApp:
                 return
 
             try:
-                font_path = fm.findfont(font_family_selected)
+                font_path = _find_font_file(font_family_selected)
             except Exception as e: # More general exception if findfont fails unexpectedly
                 messagebox.showerror("Font File Error", f"Could not find the font file for '{font_family_selected}'.\nTry selecting a different font.\nError: {e}")
                 self.status_label.configure(text=f"Error: Font file not found for {font_family_selected}")
                 return
 
-            # Load font once for metrics and use in insert_text
+            # Read the font file once; the bytes go to every worker, which parses them in _init_render_worker.
+            # Parsing here as well reports a bad font file before any worker starts.
             try:
-                # This fitz_font object is for getting text_length.
-                # The actual font size will be passed to insert_text per field.
-                fitz_font_for_metrics = fitz.Font(fontname=font_family_selected, fontfile=font_path)
+                font_bytes, _ = self._get_fitz_font(font_family_selected)
             except Exception as e:
                 messagebox.showerror("Font Load Error", f"Could not load the font '{font_family_selected}' from path '{font_path}'.\n{e}")
+                return # TextWriter needs the fitz.Font object to write any text
+
+            field_specs = self._build_output_field_specs() # Row-independent geometry, computed once
+            template_bytes = self._template_pdf_bytes # Read once at load; workers open per-row copies from memory
+
+            save_options = self._output_save_options()
+            # Rows whose inputs hash to the same key as the file already in the output folder are not rendered again
+            output_dir = self.output_dir.get()
+            output_cache = _load_output_cache(output_dir)
+            batch_hasher = _batch_input_hasher(template_bytes, font_family_selected, font_bytes, field_specs, save_options)
+
+            # One job per row: (cell strings indexed by original Excel column, output path)
+            jobs = []
+            row_keys = {} # output path -> content hash, recorded in output_cache once the row is written
+            skipped = 0
+            for index, row_strings in enumerate(cell_strings):
+                # Skip if this row is the header row and we are excluding it
+                if not self.include_header_row.get() and index == 0:
+                    row_values = []
+                else:
+                    row_values = row_strings.tolist()
+                output_name = f"output_pdf_{index + 1 - (0 if self.include_header_row.get() else 1)}.pdf"
+                output_filename = os.path.join(output_dir, output_name)
+                row_hasher = batch_hasher.copy()
+                row_hasher.update(json.dumps(row_values).encode())
+                row_key = row_hasher.hexdigest()
+                if output_cache.get(output_name) == row_key and os.path.isfile(output_filename):
+                    skipped += 1
+                    continue
+                row_keys[output_filename] = row_key
+                jobs.append((row_values, output_filename))
+
+            # Rows are independent: render them in parallel worker processes, off the Tk thread
+            # No more workers than rows: each worker pays process start-up plus template/font parsing once
+            num_workers = max(1, min(os.cpu_count() or 1, len(jobs)))
+            executor = ProcessPoolExecutor(max_workers=num_workers,
+                                           initializer=_init_render_worker,
+                                           initargs=(template_bytes, font_family_selected, font_bytes, field_specs, save_options))
+
+            # Rows are handed to the pool a window at a time from _poll_batch_progress, so the Tk thread never
+            # pickles and queues the whole sheet in one go and only a few rows per worker are pending at once
+            self._batch_job = {"executor": executor, "jobs": jobs, "next_job": 0, "in_flight": 0,
+                               "max_in_flight": num_workers * BATCH_ROWS_IN_FLIGHT_PER_WORKER,
+                               "queue": queue.Queue(), # Filled from the executor's thread, drained by _poll_batch_progress
+                               "total": len(jobs), "generated": 0, "skipped": skipped, "error": None,
+                               "output_dir": output_dir, "output_cache": output_cache, "row_keys": row_keys}
+            self._set_generate_buttons_state(tk.DISABLED)
+            self.status_label.configure(text=f"Processing files... (0/{len(jobs)})")
+            self._submit_batch_rows(self._batch_job)
+            self.master.after(BATCH_PROGRESS_POLL_MS, self._poll_batch_progress)
 
-            self.status_label.configure(text="Processing files...")
-            self.master.update_idletasks() # Update GUI
-            
-            num_files_generated = 0 # Initialize counter for generated files
-            # Iterate over rows, skipping the first row if include_header_row is false
-            for index, row in df.iterrows():                
-                doc_copy = fitz.open(self.pdf_path.get())
-                # page_to_modify will be determined per column based on stored page_num
-
-                for managed_idx in range(len(self.managed_columns)):
-                    if not (managed_idx < len(self.coords_pdf) and \
-                            managed_idx < len(self.is_rtl_vars) and \
-                            managed_idx < len(self.col_alignment_vars) and \
-                            managed_idx < len(self.col_font_size_vars)):
-                        continue # Should not happen
-
-                    original_excel_col_idx = self.managed_columns[managed_idx]['original_excel_col_idx']
-                    field_font_size_pt = self.col_font_size_vars[managed_idx].get()
-                    coord_data_output = self.coords_pdf[managed_idx]
-
-                    # Skip if this row is the header row and we are excluding it
-                    if not self.include_header_row.get() and index == 0:
-                         continue
-                    if original_excel_col_idx >= row.size or not coord_data_output or not coord_data_output.get('coord'): # Check if column exists in row data and coord is set
-                        continue # Skip if data for this column is missing or not configured
-
-                    val = str(row.iloc[original_excel_col_idx]) if pd.notna(row.iloc[original_excel_col_idx]) else ""
-                    alignment_output = self.col_alignment_vars[managed_idx].get()
-                    is_rtl_output = self.is_rtl_vars[managed_idx].get()
-                    
-                    page_num_to_modify = coord_data_output['page_num']
-                    pdf_coord_to_insert = coord_data_output['coord']
-                    page_object_to_modify = doc_copy.load_page(page_num_to_modify)
-
-                    self._insert_text_on_pdf_page(page_object_to_modify,
-                                                  val, pdf_coord_to_insert,
-                                                  font_family_selected, font_path, field_font_size_pt,
-                                                  is_rtl_output, alignment_output, fitz_font_for_metrics)
+        except Exception as e:
+            self.status_label.configure(text="Error during file generation.")
+            messagebox.showerror("Processing Error", str(e))
 
-                output_filename = os.path.join(self.output_dir.get(), f"output_pdf_{index + 1 - (0 if self.include_header_row.get() else 1)}.pdf")
-                doc_copy.save(output_filename, garbage=4, deflate=True) # Add save options
-                doc_copy.close()
-                num_files_generated += 1
+    def _set_generate_buttons_state(self, state):
+        self.generate_all_pdfs_button.configure(state=state)
+        self.generate_current_pdf_button.configure(state=state)
 
-            self.status_label.configure(text=f"Finished generating {num_files_generated} PDF files in: {self.output_dir.get()}")
-            messagebox.showinfo("Success", f"{num_files_generated} PDF files generated successfully!")
+    def _submit_batch_rows(self, job):
+        """Tops up the pool to max_in_flight pending rows; shuts the pool down once nothing more will be submitted."""
+        jobs = job["jobs"]
+        while job["error"] is None and job["next_job"] < len(jobs) and job["in_flight"] < job["max_in_flight"]:
+            row_values, output_filename = jobs[job["next_job"]]
+            try:
+                future = job["executor"].submit(_render_one_pdf, row_values, output_filename)
+            except BrokenProcessPool as e: # A worker died; rows already submitted fail through their futures
+                job["error"] = e
+                break
+            future.add_done_callback(job["queue"].put)
+            job["next_job"] += 1
+            job["in_flight"] += 1
+        if job["executor"] is not None and (job["error"] is not None or job["next_job"] == len(jobs)):
+            job["executor"].shutdown(wait=False) # Workers exit once the submitted rows are done
+            job["executor"] = None
+
+    def _poll_batch_progress(self):
+        """Collects finished rows from the worker processes, submits more, updates the progress and finishes the batch."""
+        job = self._batch_job
+        while True:
+            try:
+                future = job["queue"].get_nowait()
+            except queue.Empty:
+                break
+            job["in_flight"] -= 1
+            error = future.exception()
+            if error is None:
+                job["generated"] += 1
+                output_filename = future.result()
+                job["output_cache"][os.path.basename(output_filename)] = job["row_keys"][output_filename]
+            elif job["error"] is None: # First failure: submit no further rows
+                job["error"] = error
+        self._submit_batch_rows(job)
+
+        if job["in_flight"] > 0:
+            self.status_label.configure(text=f"Processing files... ({job['generated']}/{job['total']})")
+            self.master.after(BATCH_PROGRESS_POLL_MS, self._poll_batch_progress)
+            return
 
-        except Exception as e:
+        self._batch_job = None
+        self._set_generate_buttons_state(tk.NORMAL)
+        _save_output_cache(job["output_dir"], job["output_cache"]) # Also keeps the rows written before a failure
+        if job["error"] is not None:
             self.status_label.configure(text="Error during file generation.")
-            messagebox.showerror("Processing Error", str(e))
+            messagebox.showerror("Processing Error", str(job["error"]))
+            return
+        skipped_note = f" ({job['skipped']} unchanged files kept)" if job["skipped"] else ""
+        self.status_label.configure(text=f"Finished generating {job['generated']} PDF files in: {job['output_dir']}{skipped_note}")
+        messagebox.showinfo("Success", f"{job['generated']} PDF files generated successfully!{skipped_note}")
 
     def generate_single_preview_pdf(self):
         if self.signature_mode_active.get():
@@ -2237,10 +2898,9 @@ class PDFBatchApp:
             return
 
         try:
-            font_path = fm.findfont(font_family_selected)
             # This fitz_font object is for getting text_length.
             # The actual font size will be passed to insert_text per field.
-            fitz_font_for_metrics = fitz.Font(fontname=font_family_selected, fontfile=font_path)
+            _, fitz_font_for_metrics = self._get_fitz_font(font_family_selected)
         except Exception as e:
             messagebox.showerror("Font Error", f"Could not load the font '{font_family_selected}'.\n{e}")
 
@@ -2256,51 +2916,22 @@ class PDFBatchApp:
         if not output_filepath: # User cancelled save dialog
             return
 
+        doc_copy = None
         try:
             self.status_label.configure(text="Generating current PDF...")
             self.master.update_idletasks()
 
-            row_data = self.excel_data_preview.iloc[current_row_idx]
-            doc_copy = fitz.open(self.pdf_path.get())
-            # page_to_modify will be determined per column
-
-            for managed_idx in range(len(self.managed_columns)):
-                if not (managed_idx < len(self.coords_pdf) and \
-                        managed_idx < len(self.is_rtl_vars) and \
-                        managed_idx < len(self.col_alignment_vars) and \
-                        managed_idx < len(self.col_font_size_vars)):
-                    continue
-
-                original_excel_col_idx = self.managed_columns[managed_idx]['original_excel_col_idx']
-                field_font_size_pt = self.col_font_size_vars[managed_idx].get()
-                coord_data_single = self.coords_pdf[managed_idx]
-
-                # This check is technically redundant due to the one at the start of the function for current_row_idx == 0
-                # but kept for safety if logic changes.
-                # if not self.include_header_row.get() and current_row_idx == 0: continue
-                if original_excel_col_idx >= row_data.size or not coord_data_single or not coord_data_single.get('coord'): # Check if column exists in row data and coord is set
-                    continue
-
-                val = str(row_data.iloc[original_excel_col_idx]) if pd.notna(row_data.iloc[original_excel_col_idx]) else ""
-                is_rtl_output = self.is_rtl_vars[managed_idx].get()
-                alignment_output = self.col_alignment_vars[managed_idx].get()
-                
-                page_num_to_modify_single = coord_data_single['page_num']
-                pdf_coord_to_insert_single = coord_data_single['coord']
-                page_object_to_modify_single = doc_copy.load_page(page_num_to_modify_single)
-
-                self._insert_text_on_pdf_page(page_object_to_modify_single,
-                                              val, pdf_coord_to_insert_single,
-                                              font_family_selected, font_path, field_font_size_pt,
-                                              is_rtl_output, alignment_output, fitz_font_for_metrics)
-
-            doc_copy.save(output_filepath, garbage=4, deflate=True)
-            doc_copy.close()
-            self.status_label.configure(text=f"current PDF saved to: {output_filepath}")
-            messagebox.showinfo("Success", f"current PDF saved successfully!")
+            doc_copy = fitz.open(stream=self._template_pdf_bytes, filetype="pdf") # In-memory copy of the template
+            row_values = self._get_display_row(current_row_idx) # Same cell strings the preview shows
+            _render_row_text(doc_copy, row_values, self._build_output_field_specs(), fitz_font_for_metrics)
+            self._save_output_in_background(doc_copy, output_filepath, f"current PDF saved to: {output_filepath}",
+                                            "current PDF saved successfully!", "Error Generating current PDF")
         except Exception as e:
             self.status_label.configure(text="Error generating current PDF.")
             messagebox.showerror("Error Generating current PDF", str(e))
+        finally:
+            if doc_copy is not None and not doc_copy.is_closed: # Not handed off (the save closes it)
+                doc_copy.close()
 
     # --- Signature Mode Methods ---
     def load_signature_image_prompt(self):
@@ -2346,9 +2977,9 @@ class PDFBatchApp:
                 messagebox.showerror("Error", "Signature width must be positive.")
                 return
             
-            new_height_pt = new_width_pt / sig_data['aspect_ratio']
-            # sig_data['pdf_rect_pts'].x1 = sig_data['pdf_rect_pts'].x0 + new_width_pt # Logic moved to resize handlers
-            # sig_data['pdf_rect_pts'].y1 = sig_data['pdf_rect_pts'].y0 + new_height_pt
+            new_height_pt = new_width_pt / sig_data.aspect_ratio
+            # sig_data.pdf_rect_pts.x1 = sig_data.pdf_rect_pts.x0 + new_width_pt # Logic moved to resize handlers
+            # sig_data.pdf_rect_pts.y1 = sig_data.pdf_rect_pts.y0 + new_height_pt
             # self.signature_height_var.set(round(new_height_pt,2)) # Variable removed
             # self._draw_placed_signatures() # Redraws images and then calls _redraw_selection_highlights()
             self.status_label.configure(text="Signature size updated.")
@@ -2404,30 +3035,32 @@ class PDFBatchApp:
         )
         if not output_filepath: return
 
+        doc_to_sign = None
         try:
             self.status_label.configure(text="Creating signed PDF...")
             self.master.update_idletasks()
             
-            doc_to_sign = fitz.open(self.pdf_path.get()) # Open fresh copy of original PDF
+            doc_to_sign = fitz.open(stream=self._template_pdf_bytes, filetype="pdf") # Fresh in-memory copy of original PDF
 
             for placed_sig_data in self.placed_signatures_data:
-                pil_idx = placed_sig_data['pil_image_idx']
+                pil_idx = placed_sig_data.pil_image_idx
                 _, image_file_path, _ = self.loaded_signature_pil_images[pil_idx]
-                pdf_rect = placed_sig_data['pdf_rect_pts'] # This is already in PDF points, y from top
+                pdf_rect = placed_sig_data.pdf_rect_pts # This is already in PDF points, y from top
 
                 for page_num in range(doc_to_sign.page_count):
                     page = doc_to_sign.load_page(page_num)
                     # insert_image uses rect where y0 is top, y1 is bottom. Our pdf_rect_pts is already like that.
                     page.insert_image(pdf_rect, filename=image_file_path, keep_proportion=True, overlay=True)
             
-            doc_to_sign.save(output_filepath, garbage=4, deflate=True) # Save with options
-            doc_to_sign.close()
-            self.status_label.configure(text=f"Signed PDF saved to: {output_filepath}")
-            messagebox.showinfo("Success", "Signed PDF created and saved successfully!")
+            self._save_output_in_background(doc_to_sign, output_filepath, f"Signed PDF saved to: {output_filepath}",
+                                            "Signed PDF created and saved successfully!", "Error Creating Signed PDF")
 
         except Exception as e:
             self.status_label.configure(text="Error creating signed PDF.")
             messagebox.showerror("Error Creating Signed PDF", f"Error creating signed PDF: {e}")
+        finally:
+            if doc_to_sign is not None and not doc_to_sign.is_closed: # Not handed off (the save closes it)
+                doc_to_sign.close()
 
     # Helper for signature rect conversion
     def _pdf_rect_to_relative_canvas_rect_params(self, pdf_rect_pts: fitz.Rect):
@@ -2475,23 +3108,19 @@ class PDFBatchApp:
 
     # --- Resize Handle Methods ---
     def _on_resize_handle_enter(self, event):
-        item_id = self.canvas.find_withtag(tk.CURRENT)
-        if not item_id: return
-        tags = self.canvas.gettags(item_id[0])
-        # Determine cursor based on handle type (e.g., "handle_tl", "handle_br")
-        # For simplicity, using "sizing" for all now. More specific cursors can be added.
-        # e.g. if "handle_tl" in tags or "handle_br" in tags: self.canvas.config(cursor="size_nw_se")
-        #      elif "handle_tr" in tags or "handle_bl" in tags: self.canvas.config(cursor="size_ne_sw")
+        item_id = event.widget.find_withtag("current")
+        if not item_id or item_id[0] not in self._handle_meta: return
+        # For simplicity, using "sizing" for all handles now. More specific cursors can be added
+        # from the handle type in self._handle_meta (e.g. "tl"/"br" -> "size_nw_se").
         self.canvas.config(cursor="sizing")
         self.canvas.itemconfig(item_id[0], fill=RESIZE_HANDLE_ACTIVE_COLOR)
 
     def _on_resize_handle_leave(self, event):
-        item_id = self.canvas.find_withtag(tk.CURRENT) # Or check event.widget if it's the handle itself
+        item_id = event.widget.find_withtag("current")
         # Only reset cursor if not actively resizing OR if the item left is not the one being resized
         is_active_resize_on_this_handle = False
-        if self._resize_data["active"] and item_id:
-            tags = self.canvas.gettags(item_id[0])
-            if f"handle_sig_{self._resize_data['sig_idx']}" in tags and f"handle_{self._resize_data['handle_type']}" in tags:
+        if self._resize_data.active and item_id:
+            if self._handle_meta.get(item_id[0]) == (self._resize_data.sig_idx, self._resize_data.handle_type):
                 is_active_resize_on_this_handle = True
         
         if not is_active_resize_on_this_handle:
@@ -2501,43 +3130,25 @@ class PDFBatchApp:
 
 
     def _on_resize_handle_press(self, event):
-        item_tuple = self.canvas.find_withtag(tk.CURRENT)
+        self._item_press_active = True # Tells _on_canvas_b1_press this press belongs to an item
+        psd = self.placed_signatures_data # Local aliases for this B1 hot path
+        resize_state = self._resize_data
+        item_tuple = event.widget.find_withtag("current")
         if not item_tuple: return "break"
         item_id = item_tuple[0]
-        tags = self.canvas.gettags(item_id)
-
-        sig_idx = -1
-        handle_type = None
-        for tag in tags:
-            if tag.startswith("handle_sig_"):
-                sig_idx = int(tag.split("_")[2])
-            elif tag.startswith("handle_") and not tag.startswith("handle_sig_"):
-                handle_type = tag.split("_")[1] # "tl", "tr", "br", "bl"
+        sig_idx, handle_type = self._handle_meta.get(item_id, (-1, None))
         
-        if sig_idx != -1 and handle_type and 0 <= sig_idx < len(self.placed_signatures_data):
+        if sig_idx != -1 and handle_type and 0 <= sig_idx < len(psd):
             # # print(f"DEBUG RESIZE PRESS: Matched sig_idx={sig_idx}, handle={handle_type}. Setting resize active.")
-            self._select_placed_signature(sig_idx, from_press_event=True) # Ensure it's selected
-            sig_data = self.placed_signatures_data[sig_idx]
-            self._resize_data["active"] = True
-            self._resize_data["sig_idx"] = sig_idx
-            self._resize_data["handle_type"] = handle_type
-            self._resize_data["start_mouse_x_canvas"] = self.canvas.canvasx(event.x)
-            self._resize_data["start_mouse_y_canvas"] = self.canvas.canvasy(event.y)
-            self._resize_data["original_pdf_rect"] = fitz.Rect(sig_data['pdf_rect_pts'].x0, sig_data['pdf_rect_pts'].y0, sig_data['pdf_rect_pts'].x1, sig_data['pdf_rect_pts'].y1)
-            self._resize_data["aspect_ratio"] = sig_data['aspect_ratio']
+            if self.selected_placed_signature_idx.get() != sig_idx: # Handles are only drawn for the selected signature, so this is rare
+                self._select_placed_signature(sig_idx, from_press_event=True) # Ensure it's selected
+            sig_data = psd[sig_idx]
+            r = sig_data.pdf_rect_pts
+            resize_state.active = True
+            resize_state.sig_idx = sig_idx
+            resize_state.handle_type = handle_type
+            resize_state.start_mouse_x_canvas, resize_state.start_mouse_y_canvas = self._event_canvas_xy(event)
+            resize_state.original_pdf_rect = (r.x0, r.y0, r.x1, r.y1) # Plain tuple; Rect rebuilt in the motion handler
+            resize_state.aspect_ratio = sig_data.aspect_ratio
             self._item_drag_active = True # Prevent panning and other B1 canvas actions
             return "break" # Consume the event
-
-if __name__ == "__main__":
-    customtkinter.set_appearance_mode("System")  # Modes: "System" (default), "Dark", "Light"
-    customtkinter.set_default_color_theme("blue")  # Themes: "blue" (default), "green", "dark-blue"
-
-    root = customtkinter.CTk()
-    
-    # Default font for CTk widgets is handled by the theme or can be set per widget.
-    # The root.option_add("*Font", default_font) is less common/effective for CTk.
-    # If a global font change is desired, it's often done by creating a CTkFont object
-    # and passing it to widgets, or by modifying the theme.
- 
-    app = PDFBatchApp(root)
-    root.mainloop()
\ No newline at end of file
@@ -2,7 +2,7 @@
 
 
 a = Analysis(
-    ['PDFDataInjector.py'],
+    ['__main__.py'],
     pathex=[],
     binaries=[],
     datas=[],
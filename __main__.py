@@ -0,0 +1,18 @@
+import multiprocessing
+import customtkinter
+from PDFDataInjector import PDFBatchApp
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Batch generation uses worker processes (needed for frozen Windows builds)
+    customtkinter.set_appearance_mode("System")  # Modes: "System" (default), "Dark", "Light"
+    customtkinter.set_default_color_theme("blue")  # Themes: "blue" (default), "green", "dark-blue"
+
+    root = customtkinter.CTk()
+
+    # Default font for CTk widgets is handled by the theme or can be set per widget.
+    # The root.option_add("*Font", default_font) is less common/effective for CTk.
+    # If a global font change is desired, it's often done by creating a CTkFont object
+    # and passing it to widgets, or by modifying the theme.
+
+    app = PDFBatchApp(root)
+    root.mainloop()
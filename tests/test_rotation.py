@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+import fitz
+
+from PDFDataInjector import _render_row_text
+
+
+def _template(rotation):
+    """One 400x600 pt page with /Rotate set to rotation."""
+    doc = fitz.open()
+    page = doc.new_page(width=400, height=600)
+    page.set_rotation(rotation)
+    return doc
+
+
+def _visible_line_boxes(page):
+    """Bounding boxes of the page's text lines in visible (rotated) page coordinates."""
+    return [fitz.Rect(line["bbox"]) * page.rotation_matrix
+            for block in page.get_text("dict")["blocks"] for line in block.get("lines", [])]
+
+
+class RotatedTemplateTest(unittest.TestCase):
+    def setUp(self):
+        self.font = fitz.Font("helv")
+        self.field_specs = {
+            "excel_col": np.array([0, 1], dtype=int),
+            "page_num": np.array([0, 0], dtype=int),
+            "x": np.array([50.0, 120.0], dtype=float),
+            "insertion_y": np.array([100.0, 250.0], dtype=float), # Visible coordinates, y from the top
+            "font_size": np.array([20.0, 12.0], dtype=float),
+            "align_factor": np.array([0.0, 0.0], dtype=float),
+            "is_rtl": np.array([False, False], dtype=bool),
+        }
+
+    def _render(self, rotation):
+        doc = _template(rotation)
+        _render_row_text(doc, ["Hello World", "Second field"], self.field_specs, self.font)
+        return doc
+
+    def test_text_matches_unrotated_page_in_visible_coordinates(self):
+        reference_doc = fitz.open()
+        reference_doc.new_page(width=600, height=400) # Visible size of the 90/270 degree templates
+        _render_row_text(reference_doc, ["Hello World", "Second field"], self.field_specs, self.font)
+        reference_boxes = _visible_line_boxes(reference_doc[0])
+        self.assertEqual(len(reference_boxes), 2)
+
+        for rotation in (90, 270):
+            with self.subTest(rotation=rotation):
+                doc = self._render(rotation)
+                boxes = _visible_line_boxes(doc[0])
+                self.assertEqual(len(boxes), 2)
+                for box, reference_box in zip(boxes, reference_boxes):
+                    self.assertGreater(box.width, box.height) # Reads left to right for the viewer
+                    for value, reference_value in zip(box, reference_box):
+                        self.assertAlmostEqual(value, reference_value, delta=0.5)
+
+    def test_upside_down_page(self):
+        reference_boxes = _visible_line_boxes(self._render(0)[0])
+        boxes = _visible_line_boxes(self._render(180)[0])
+        self.assertEqual(len(boxes), 2)
+        for box, reference_box in zip(boxes, reference_boxes):
+            for value, reference_value in zip(box, reference_box):
+                self.assertAlmostEqual(value, reference_value, delta=0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()